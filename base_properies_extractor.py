@@ -1,19 +1,52 @@
 import os
+import csv
+import queue
+import atexit
 import json
+import asyncio
+import sqlite3
+import logging
 import traceback
+import httpx
 import pandas as pd
+from functools import lru_cache
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Any, TypedDict, Optional, List, Dict
+from typing import Any, TypedDict, Optional, List, Dict, Tuple, Union
 
+from langchain_core.runnables import RunnableLambda
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, END
 
+try:
+    from pyarrow import csv as pa_csv
+except ImportError:  # pyarrow is optional, fall back to pandas
+    pa_csv = None
+
 from abc import ABC, abstractmethod
 
+from .helpers import robust_json_parse
+from .llm_cache import LLMCache
+from .semantic_cache import SemanticCache
+
+# Background writer thread of each file logger, by logger name
+_LOG_LISTENERS : Dict[str, QueueListener] = {}
+
+@lru_cache(maxsize=32)
+def _cached_read(file_path: str, mtime: float) -> str:
+    """Reads and decodes a text file once per (path, mtime), so an edited file is re-read."""
+    with open(file_path, "rb") as f:
+        text = f.read().decode("utf-8")
+    # Same result as text mode (universal newlines), without the per-line translation when there is no "\r"
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
 class State(TypedDict):
     folder: Path
     fulltext: Optional[str]
-    llm: Optional[Any]
+    max_tokens: Optional[int]
+    table_max_tokens: Optional[int]
     material_names: Optional[list]
     thermo: Optional[dict]
     structure: Optional[dict]
@@ -33,8 +66,34 @@ class BasePropertiesExtractor(ABC):
     FIND_MATERIALS_MAX_TOKENS = 512*100
     DEFAULT_TOKEN_COUNT = 999*2
 
+    # Disk cache of LLM responses; bump PROMPT_VERSION when prompts/parsing change meaning.
+    # The EXTRACTION_CACHE_DIR env variable overrides LLM_CACHE_DIR.
+    LLM_CACHE_ENABLED = True
+    LLM_CACHE_DIR = os.path.join("data", "llm_cache")
+    LLM_CACHE_TTL_DAYS = 7
+    PROMPT_VERSION = "v1"
+
+    # Near-duplicate reuse of responses by embedding similarity (needs sentence-transformers).
+    # Off by default: it loads an embedding model and trades exactness for hit rate.
+    SEMANTIC_CACHE_ENABLED = False
+    SEMANTIC_CACHE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+    HTTP_MAX_KEEPALIVE = 32
+
+    # Path of a SQLite file for LangGraph checkpoints (needs langgraph-checkpoint-sqlite).
+    # When set, a paper whose previous run failed resumes from the last completed node.
+    CHECKPOINT_DB : Optional[str] = None
+
+    # Judge logs go through size-capped rotating files; the per-paper validation log is
+    # additionally buffered in memory and written LOG_BUFFER_CAPACITY records at a time.
+    # Files are written by a background thread, so the judge never waits on the disk.
+    JUDGE_ERROR_LOG = "judge_error_log.txt"
+    JUDGE_VALIDATION_LOG = "judge_validation_log.txt"
+    LOG_MAX_BYTES = 10_000_000
+    LOG_BACKUP_COUNT = 3
+    LOG_BUFFER_CAPACITY = 1024
+
     def __init__(self) -> None:
-        self.state : Optional[State] = None
         self.app = self.build_app()
 
         self.model_name = os.getenv("OPENAI_MODEL")
@@ -50,6 +109,24 @@ class BasePropertiesExtractor(ABC):
         if missing:
             raise RuntimeError(f"Missing required env variables: {', '.join(missing)}")
 
+        self.llm_cache : Optional[LLMCache] = None
+        if self.LLM_CACHE_ENABLED:
+            # Every prompt asks for JSON: a cached response that no longer parses is dropped and re-requested
+            self.llm_cache = LLMCache(os.getenv("EXTRACTION_CACHE_DIR") or self.LLM_CACHE_DIR, ttl_days=self.LLM_CACHE_TTL_DAYS,
+                                      prompt_version=self.PROMPT_VERSION, validate=robust_json_parse)
+
+        self.semantic_cache : Optional[SemanticCache] = None
+        if self.SEMANTIC_CACHE_ENABLED:
+            self.semantic_cache = SemanticCache(self.SEMANTIC_CACHE_MODEL)
+
+        # One client per (max_tokens, temperature), sharing a keep-alive HTTP connection pool across papers
+        self._http_client = httpx.Client(limits=httpx.Limits(max_keepalive_connections=self.HTTP_MAX_KEEPALIVE))
+        self._llm_pool : Dict[Tuple[int, float], ChatOpenAI] = {}
+
+        self._judge_logger = self._make_file_logger("judge_error", self.JUDGE_ERROR_LOG)
+        self._validation_logger = self._make_file_logger("judge_validation", self.JUDGE_VALIDATION_LOG,
+                                                         buffer_capacity=self.LOG_BUFFER_CAPACITY)
+
     @abstractmethod
     def extract_material_candidates(self, fulltext: str, llm, max_materials: int = 20) -> List[str]:
         raise NotImplementedError
@@ -75,26 +152,113 @@ class BasePropertiesExtractor(ABC):
                             llm=None,
                             folder_name: str = None) -> dict:
         raise NotImplementedError
+
+    # === Async variants (default: run the sync implementation in a worker thread) ===
+    async def aextract_material_candidates(self, fulltext: str, llm, max_materials: int = 20) -> List[str]:
+        return await asyncio.to_thread(self.extract_material_candidates, fulltext, llm, max_materials)
+
+    async def aextract_thermo_properties(self, fulltext: str, llm, material_names: Optional[List[str]] = None) -> Dict:
+        return await asyncio.to_thread(self.extract_thermo_properties, fulltext, llm, material_names)
+
+    async def aextract_structural_properties(self, fulltext: str, llm, material_names: list = None) -> Dict:
+        return await asyncio.to_thread(self.extract_structural_properties, fulltext, llm, material_names)
+
+    async def aextract_from_tables(self, table_data: list, llm, material_names: list = None) -> dict:
+        return await asyncio.to_thread(self.extract_from_tables, table_data, llm, material_names)
     
+    def _get_llm(self, max_tokens: int, temperature: float = 0.001) -> ChatOpenAI:
+        key = (max_tokens, temperature)
+        llm = self._llm_pool.get(key)
+        if llm is None:
+            llm = ChatOpenAI(
+                model=self.model_name,
+                base_url=self.base_url,
+                api_key=self.api_key,
+                cache=self.llm_cache,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                http_client=self._http_client
+            )
+            self._llm_pool[key] = llm
+        return llm
+
+    @classmethod
+    def _make_file_logger(cls, name: str, path: str, buffer_capacity: int = 0) -> logging.Logger:
+        """
+        Returns a logger writing bare messages to a rotating file; handlers are attached once per process.
+        Records are only queued by the caller and written by a QueueListener thread.
+        With buffer_capacity > 0, INFO records are held in memory and written in batches; ERROR and above
+        flush immediately. At exit the queue is drained first, then logging's own exit hook flushes the rest.
+        """
+        logger = logging.getLogger(f"{__name__}.{name}")
+        if not logger.handlers:
+            handler = RotatingFileHandler(path, maxBytes=cls.LOG_MAX_BYTES, backupCount=cls.LOG_BACKUP_COUNT,
+                                          encoding="utf-8", delay=True)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            if buffer_capacity > 0:
+                handler = MemoryHandler(buffer_capacity, flushLevel=logging.ERROR, target=handler)
+            log_queue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, handler)
+            listener.start()
+            atexit.register(listener.stop)
+            _LOG_LISTENERS[logger.name] = listener
+            logger.addHandler(QueueHandler(log_queue))
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+        return logger
+
+    @staticmethod
+    def flush_logs() -> None:
+        """Writes out every queued and buffered judge log record, e.g. before reading the log files."""
+        for listener in _LOG_LISTENERS.values():
+            listener.stop()   # drains the queue
+            for handler in listener.handlers:
+                handler.flush()
+            listener.start()
+
     @staticmethod
     def read_fulltext(file_path: str) -> str:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.read()
+        # Repeated reads of an unchanged file (reruns, retries) are served from memory
+        return _cached_read(file_path, os.path.getmtime(file_path))
+
+    def extract_properties(self, paper_folder: Path) -> State:
+        if self.app.checkpointer is None:
+            return self.app.invoke(self._generate_empty_state(paper_folder))
+        config = {"configurable": {"thread_id": str(paper_folder)}}
+        # Resume an interrupted run from its last checkpoint, otherwise start over
+        resume = bool(self.app.get_state(config).next)
+        return self.app.invoke(None if resume else self._generate_empty_state(paper_folder), config)
+
+    async def aextract_properties(self, paper_folder: Path) -> State:
+        if self.app.checkpointer is not None:
+            # SqliteSaver is sync-only
+            return await asyncio.to_thread(self.extract_properties, paper_folder)
+        return await self.app.ainvoke(self._generate_empty_state(paper_folder))
+
+    async def arun_batch(self, folders: List[Path], concurrency: int = 8) -> List[State]:
+        """Runs the graph for several paper folders, at most `concurrency` papers at a time."""
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one(folder: Path) -> State:
+            async with sem:
+                return await self.aextract_properties(folder)
 
-    def extract_properties(self, paper_folder: Path) -> None:
-        self.state = self._generate_empty_state(paper_folder)
-        self.app.invoke(self.state)
+        return await asyncio.gather(*(_one(folder) for folder in folders))
+
+    def run_batch(self, folders: List[Path], concurrency: int = 8) -> List[State]:
+        return asyncio.run(self.arun_batch(folders, concurrency=concurrency))
 
     def build_app(self) -> StateGraph:
         # === Graph Wiring ===
         graph = StateGraph(State)
         graph.add_node("read_file", self._read_fulltext_node)
         graph.add_node("set_tokens", self._set_tokens_node)
-        graph.add_node("Find_materials", self._find_materials_node)
-        graph.add_node("Thermoelectric_prop", self._extract_thermo_node)
-        graph.add_node("Structural_prop", self._extract_structure_node)
+        graph.add_node("Find_materials", RunnableLambda(self._find_materials_node, afunc=self._afind_materials_node))
+        # Thermo, structure and table extraction are independent LLM calls → run as parallel branches
+        graph.add_node("Thermoelectric_prop", RunnableLambda(self._extract_thermo_node, afunc=self._aextract_thermo_node))
+        graph.add_node("Structural_prop", RunnableLambda(self._extract_structure_node, afunc=self._aextract_structure_node))
         graph.add_node("Plan_table_tokens", self._count_table_and_plan_tokens_node)
-        graph.add_node("Extract_table_JSON", self._extract_table_json_node)
+        graph.add_node("Extract_table_JSON", RunnableLambda(self._extract_table_json_node, afunc=self._aextract_table_json_node))
         graph.add_node("Judge_verification", self._judge_node)
         graph.add_node("Write_json", self._write_node)
         # === Define Edges ===
@@ -108,34 +272,36 @@ class BasePropertiesExtractor(ABC):
 
         graph.add_conditional_edges("Find_materials", self._skip_if_no_materials, {
             END: END,
-            "Thermoelectric_prop": "Thermoelectric_prop"
+            "Thermoelectric_prop": "Thermoelectric_prop",
+            "Structural_prop": "Structural_prop",
+            "Plan_table_tokens": "Plan_table_tokens"
         })
 
-        graph.add_edge("Thermoelectric_prop", "Structural_prop")
-        graph.add_edge("Structural_prop", "Plan_table_tokens")
-
+        graph.add_edge("Plan_table_tokens", "Extract_table_JSON")
 
-
-        graph.add_conditional_edges("Plan_table_tokens", self._table_branch, {
-            "has_tables": "Extract_table_JSON",
-            "no_tables": "Judge_verification"
-        })
-
-        graph.add_edge("Extract_table_JSON", "Judge_verification")
+        # Join: the judge waits for all three branches
+        graph.add_edge(["Thermoelectric_prop", "Structural_prop", "Extract_table_JSON"], "Judge_verification")
         graph.add_edge("Judge_verification", "Write_json")
         graph.add_edge("Write_json", END)
 
         # === Compile ===
-        app = graph.compile()
+        app = graph.compile(checkpointer=self._make_checkpointer())
         print("📊 Graph compiled.")
         return app
 
+    def _make_checkpointer(self):
+        if not self.CHECKPOINT_DB:
+            return None
+        from langgraph.checkpoint.sqlite import SqliteSaver  # optional dependency
+        return SqliteSaver(sqlite3.connect(self.CHECKPOINT_DB, check_same_thread=False))
+
     @staticmethod
     def _generate_empty_state(paper_folder : str) -> State:
         return State(
             folder = paper_folder,
             fulltext = None,
-            llm = None,
+            max_tokens = None,
+            table_max_tokens = None,
             material_names = None,
             thermo = None,
             structure = None,
@@ -146,70 +312,84 @@ class BasePropertiesExtractor(ABC):
             total_table_rows = 0
         )
 
-    def _read_fulltext_node(self, state: State) -> State:
+    # Nodes return only the keys they change; LangGraph merges them into the state.
+    def _read_fulltext_node(self, state: State) -> dict:
         text = self.read_fulltext(os.path.join(state["folder"],"fulltext.txt"))
-        return {**state, "fulltext": text, "retries": 0}
+        # The text is read once here; later nodes share this one reference through the state
+        return {"fulltext": text, "retries": 0}
 
-    def _set_tokens_node(self, state: State) -> State:
+    def _set_tokens_node(self, state: State) -> dict:
         folder = state["folder"]
         token_count = self.DEFAULT_TOKEN_COUNT
 
         if token_count == 0:
             print(f"⏭️ Skipping {os.path.basename(folder)} due to token_count = 0")
-            return {**state, "skip": True}
+            return {"skip": True}
 
         # Compute max_tokens
         max_tok = self._token_estimation(token_count)
         print(f"🧠 Setting max_tokens = {max_tok} for {os.path.basename(folder)} (token_count = {token_count})")
 
-        dynamic_llm = ChatOpenAI(
-            model=self.model_name,
-            base_url=self.base_url,
-            api_key=self.api_key,
-            temperature=0.001,
-            max_tokens=max_tok
-        )
-        return {**state, "llm": dynamic_llm, "skip": False}
+        # Only the budget goes into the state (it must stay serializable for checkpoints); nodes get the client via _get_llm
+        return {"max_tokens": max_tok, "skip": False}
 
-    def _find_materials_node(self, state: State) -> State:
+    def _find_materials_node(self, state: State) -> dict:
         # Use a small fixed-token LLM just for this step
-        small_llm = ChatOpenAI(
-            model=self.model_name,
-            base_url=self.base_url,
-            api_key=self.api_key,
-            temperature=0.001,
-            max_tokens=self.FIND_MATERIALS_MAX_TOKENS   # fixed small cap for efficiency
-        )
+        small_llm = self._get_llm(self.FIND_MATERIALS_MAX_TOKENS)   # fixed small cap for efficiency
         candidates = self.extract_material_candidates(state["fulltext"], llm=small_llm, max_materials=self.MAX_MATERIALS)
+        return self._materials_update(candidates)
+
+    async def _afind_materials_node(self, state: State) -> dict:
+        small_llm = self._get_llm(self.FIND_MATERIALS_MAX_TOKENS)
+        candidates = await self.aextract_material_candidates(state["fulltext"], llm=small_llm, max_materials=self.MAX_MATERIALS)
+        return self._materials_update(candidates)
+
+    @staticmethod
+    def _materials_update(candidates: List[str]) -> dict:
         if candidates:
             print(f"🧪 Candidate materials (thermo-mentioned): {len(candidates)} → {candidates}")
-            return {**state, "material_names": candidates, "skip": False}
+            return {"material_names": candidates, "skip": False}
 
         print("🛑 No thermo-related materials found → skipping downstream extraction.")
-        return {**state, "material_names": [], "skip": True}
+        return {"material_names": [], "skip": True}
 
-    def _extract_thermo_node(self, state: State) -> State:
+    def _extract_thermo_node(self, state: State) -> dict:
         thermo = self.extract_thermo_properties(
             state["fulltext"],
-            llm=state["llm"],
+            llm=self._get_llm(state["max_tokens"]),
+            material_names=state.get("material_names") or None
+        )
+        return self._thermo_update(thermo)
+
+    async def _aextract_thermo_node(self, state: State) -> dict:
+        thermo = await self.aextract_thermo_properties(
+            state["fulltext"],
+            llm=self._get_llm(state["max_tokens"]),
             material_names=state.get("material_names") or None
         )
+        return self._thermo_update(thermo)
+
+    @staticmethod
+    def _thermo_update(thermo: Dict) -> dict:
         if not thermo.get("materials") or not isinstance(thermo["materials"], list):
             raise ValueError("❌ Thermo extraction returned no valid materials.")
-        return {**state, "thermo": thermo}
-
-    def _extract_structure_node(self, state: State) -> State:
-        # Prefer the candidate list; if thermo produced better names, you can also merge.
-        hint_names = state.get("material_names") or []
-        # Optional improvement: union with names discovered by thermo to tighten recall.
-        thermo_names = [m.get("name") for m in state.get("thermo", {}).get("materials", []) if m.get("name")]
-        merged = list(dict.fromkeys([*hint_names, *thermo_names]))  # preserve order & dedupe
-        struct = self.extract_structural_properties(state["fulltext"], llm=state["llm"], material_names=merged or None)
+        return {"thermo": thermo}
+
+    def _extract_structure_node(self, state: State) -> dict:
+        struct = self.extract_structural_properties(state["fulltext"], llm=self._get_llm(state["max_tokens"]), material_names=state.get("material_names") or None)
+        return self._structure_update(struct)
+
+    async def _aextract_structure_node(self, state: State) -> dict:
+        struct = await self.aextract_structural_properties(state["fulltext"], llm=self._get_llm(state["max_tokens"]), material_names=state.get("material_names") or None)
+        return self._structure_update(struct)
+
+    @staticmethod
+    def _structure_update(struct: Dict) -> dict:
         if not struct.get("materials"):
             raise ValueError("❌ Structure JSON parse failed or empty.")
-        return {**state, "structure": struct, "material_names": merged}
+        return {"structure": struct}
 
-    def _count_table_and_plan_tokens_node(self, state: State) -> State:
+    def _count_table_and_plan_tokens_node(self, state: State) -> dict:
         folder = state["folder"]
         table_data = []
         total_rows = 0
@@ -221,14 +401,14 @@ class BasePropertiesExtractor(ABC):
             if not os.path.isfile(csv_path) or not os.path.isfile(caption_path):
                 break
             try:
-                df = pd.read_csv(csv_path)
+                rows = self._read_table_rows(csv_path)
                 with open(caption_path, "r", encoding="utf-8") as f:
                     caption = f.read().strip()
-                row_count = len(df)
+                row_count = len(rows)
                 table_data.append({
                     "filename": f"table{i}.csv",
                     "caption": caption,
-                    "rows": df.to_dict(orient="records"),
+                    "rows": rows,
                     "row_count": row_count
                 })
                 total_rows += row_count
@@ -242,44 +422,82 @@ class BasePropertiesExtractor(ABC):
         else:
             max_tokens = min(512*2 + total_rows * 325, 2*5120)  # Heuristic calculation
 
-        # Ensure dynamic_llm always gets updated with max_tokens
-        dynamic_llm = ChatOpenAI(
-            model=self.model_name,
-            base_url=self.base_url,
-            api_key=self.api_key,
-            temperature=0.001,
-            max_tokens=max_tokens
-        )
-
         print(f"📊 Found {len(table_data)} tables with {total_rows} rows → max_tokens = {max_tokens}")
 
         return {
-            **state,
             "table_data": table_data,
             "total_table_rows": total_rows,
-            "llm": dynamic_llm  # override with expanded LLM
+            "table_max_tokens": max_tokens  # expanded budget for the table LLM
         }
 
-    def _extract_table_json_node(self, state: State) -> State:
+    @staticmethod
+    def _table_column_names(header: List[str]) -> List[str]:
+        """Column names as pandas.read_csv makes them: "Unnamed: i" for empty ones, "S", "S.1" for duplicates."""
+        names = [name if name else f"Unnamed: {i}" for i, name in enumerate(header)]
+        taken = set(names)
+        counts: Dict[str, int] = {}
+        for i, name in enumerate(names):
+            count = counts.get(name, 0)
+            base = name
+            while count > 0:
+                counts[base] = count + 1
+                name = f"{base}.{count}"
+                # a suffixed name that is itself a header column is skipped
+                count = count + 1 if name in taken else counts.get(name, 0)
+            names[i] = name
+            counts[name] = count + 1
+        return names
+
+    @classmethod
+    def _read_table_rows(cls, csv_path: str) -> List[dict]:
+        """
+        Reads a table CSV (first line is the header) into a list of row dicts, same keys and rows as
+        pandas.read_csv, with None for missing cells.
+        pyarrow is the fast path; a ragged CSV (spanned CALS cells leave short rows) goes to pandas,
+        which pads short rows instead of failing.
+        """
+        if pa_csv is not None:
+            with open(csv_path, "r", encoding="utf-8", newline="") as f:
+                header = next(csv.reader(f), None)
+            if header and any(header):   # a blank first line is skipped by pandas, leave that to it
+                ragged = []
+                table = pa_csv.read_csv(
+                    csv_path,
+                    read_options=pa_csv.ReadOptions(column_names=cls._table_column_names(header), skip_rows=1),
+                    parse_options=pa_csv.ParseOptions(invalid_row_handler=lambda row: ragged.append(row) or "skip"),
+                    convert_options=pa_csv.ConvertOptions(strings_can_be_null=True),   # empty text cell -> None, as NaN in pandas
+                )
+                if not ragged:
+                    return table.to_pylist()
+
+        df = pd.read_csv(csv_path)
+        return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+    def _extract_table_json_node(self, state: State) -> dict:
         if not state.get("table_data"):
-            return {**state, "table_json_output": {"materials": []}}
+            return {"table_json_output": {"materials": []}}
 
         output = self.extract_from_tables(
             table_data=state["table_data"],
-            llm=state["llm"],
+            llm=self._get_llm(state["table_max_tokens"]),
             material_names=state.get("material_names")
         )
-        return {**state, "table_json_output": output}
+        return {"table_json_output": output}
 
-    def _judge_node(self, state: State) -> State:
-        folder = state["folder"]
-        llm_judge = ChatOpenAI(
-            model=self.model_name,
-            base_url=self.base_url,
-            api_key=self.api_key,
-            temperature=0.0,
-            max_tokens=self.FIND_MATERIALS_MAX_TOKENS
+    async def _aextract_table_json_node(self, state: State) -> dict:
+        if not state.get("table_data"):
+            return {"table_json_output": {"materials": []}}
+
+        output = await self.aextract_from_tables(
+            table_data=state["table_data"],
+            llm=self._get_llm(state["table_max_tokens"]),
+            material_names=state.get("material_names")
         )
+        return {"table_json_output": output}
+
+    def _judge_node(self, state: State) -> dict:
+        folder = state["folder"]
+        llm_judge = self._get_llm(self.FIND_MATERIALS_MAX_TOKENS, temperature=0.0)
         try:
             print(f"🧠 Running property-level LLM Judge for {os.path.basename(folder)}...")
             judged = self.judge_verify_properties(
@@ -290,23 +508,22 @@ class BasePropertiesExtractor(ABC):
                 llm=llm_judge,
                 folder_name=os.path.basename(folder)
             )
-            return {**state, "thermo": judged}
+            return {"thermo": judged}
 
         except Exception as e:
             # absolute fallback – never let error escape
-            log_path = "judge_error_log.txt"
-            with open(log_path, "a", encoding="utf-8") as log:
-                log.write("\n" + "=" * 60 + "\n")
-                #log.write(f"TIME: {datetime.datetime.now().isoformat()}\n")
-                log.write(f"FOLDER: {os.path.basename(folder)}\n")
-                log.write(f"ERROR TYPE: {type(e).__name__}\n")
-                log.write(f"DETAILS: {repr(e)}\n")
-                log.write(f"TRACEBACK:\n{traceback.format_exc()}\n")
-                log.write("=" * 60 + "\n")
+            self._judge_logger.error(
+                "\n" + "=" * 60 + "\n"
+                f"FOLDER: {os.path.basename(folder)}\n"
+                f"ERROR TYPE: {type(e).__name__}\n"
+                f"DETAILS: {repr(e)}\n"
+                f"TRACEBACK:\n{traceback.format_exc()}\n"
+                + "=" * 60
+            )
             print(f"⚠️ Judge node crashed in {os.path.basename(folder)}: {e}")
-            return state  # continue pipeline unchanged
+            return {}  # continue pipeline unchanged
 
-    def _write_node(self, state: State) -> State:
+    def _write_node(self, state: State) -> dict:
         folder = state["folder"]
         with open(os.path.join(folder,"t.json"), "w", encoding='utf-8') as f:
             json.dump(state["thermo"], f, indent=2)
@@ -316,7 +533,7 @@ class BasePropertiesExtractor(ABC):
             with open(os.path.join(folder,"tables_output.json"), "w", encoding='utf-8') as f:
                 json.dump(state["table_json_output"], f, indent=2)
         print(f"✅ Done: {os.path.basename(folder)}")
-        return state
+        return {}
 
     # === Retry Decision Function ===
     @staticmethod
@@ -324,12 +541,8 @@ class BasePropertiesExtractor(ABC):
         return END if state.get("skip") else "Find_materials"
 
     @staticmethod
-    def _skip_if_no_materials(state: State) -> str:
-        return END if state.get("skip") else "Thermoelectric_prop"
-
-    @staticmethod
-    def _table_branch(state: State) -> str:
-        return "has_tables" if state.get("table_data") else "no_tables"
+    def _skip_if_no_materials(state: State) -> Union[str, List[str]]:
+        return END if state.get("skip") else ["Thermoelectric_prop", "Structural_prop", "Plan_table_tokens"]
 
     @classmethod
     def _token_estimation(cls, token_count):
@@ -3,6 +3,17 @@ import json
 import pandas as pd
 from typing import Any, Dict, List
 
+from .helpers import fast_json_dumps
+
+def _freeze(x: Any) -> Any:
+    """Hashable, order-insensitive (for dicts) structural key of a JSON value."""
+    if isinstance(x, dict):
+        return ("d", frozenset((k, _freeze(v)) for k, v in x.items()))
+    if isinstance(x, list):
+        return ("l", tuple(_freeze(v) for v in x))
+    # keep the type so that 1, 1.0 and True stay distinct (as they were in JSON form)
+    return ("s", type(x), x)
+
 def _dedupe_list(items: List[Any]) -> List[Any]:
     """Deduplicate list items, including dict/list items (stable order)."""
     seen = set()
@@ -10,7 +21,7 @@ def _dedupe_list(items: List[Any]) -> List[Any]:
     for x in items:
         # make hashable key
         if isinstance(x, (dict, list)):
-            key = json.dumps(x, sort_keys=True, ensure_ascii=False)
+            key = _freeze(x)
         else:
             key = str(x)
         if key not in seen:
@@ -96,12 +107,13 @@ def compile_table(directory: str) -> None:
             if value is None:
                 row[key] = None
             elif isinstance(value, (dict, list)):
-                row[key] = json.dumps(value, ensure_ascii=False)
+                row[key] = fast_json_dumps(value)
             else:
                 row[key] = value
         flattened_rows.append(row)
 
-    df = pd.json_normalize(flattened_rows)
+    # Rows are already flat (nested values are JSON strings), no need for json_normalize
+    df = pd.DataFrame.from_records(flattened_rows)
 
     output_path = os.path.join(directory, "materials_output.csv")
     df.to_csv(output_path, index=False, encoding="utf-8")
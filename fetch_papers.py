@@ -1,65 +1,94 @@
 import os
+import csv
+import asyncio
+import httpx
 import requests
-from typing import Optional
-import pandas as pd
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Optional, Tuple
 from .helpers import safe_doi
 
-TIMEOUT = 30
+try:
+    import h2  # noqa: F401  -- нужен httpx для HTTP/2 (pip install httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import aiofiles
+except ImportError:
+    aiofiles = None
 
+TIMEOUT = 30
+POOL_SIZE = 16
+CONCURRENCY = 16
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 1
+
+# Одна сессия на модуль: TLS/TCP-соединение с Elsevier переиспользуется между DOI (Keep-Alive)
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=POOL_SIZE,
+    pool_maxsize=POOL_SIZE,
+    # raise_on_status=False: после исчерпания повторов отдаём последний ответ, ошибку бросает fetch_elsevier_xml
+    max_retries=Retry(total=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR, status_forcelist=list(RETRY_STATUSES), raise_on_status=False),
+))
+
+@lru_cache(maxsize=None)
 def load_api_key() -> str:
     """
     Загружает Elsevier API key из окружения (.env).
+    Значение читается один раз и кэшируется (ошибка не кэшируется).
     """
     api_key = os.getenv("ELSEVIER_API_KEY")
     if not api_key:
         raise RuntimeError("ELSEVIER_API_KEY not found in environment")
     return api_key
 
+@lru_cache(maxsize=None)
 def load_api_base() -> str:
     """
     Загружает базовый URL для API Elsevier.
+    Значение читается один раз и кэшируется (ошибка не кэшируется).
     """
     api_base = os.getenv("ELSEVIER_API_BASE")
     if not api_base:
         raise RuntimeError("ELSEVIER_API_BASE not found in environment")
     return api_base
 
-def fetch_elsevier_xml(doi: str) -> str:
+def _elsevier_headers() -> dict:
+    return {
+        "X-ELS-APIKey": load_api_key(),
+        "Accept": "application/xml",
+        "User-Agent": "elsevier-oa-test-script",
+    }
+
+def fetch_elsevier_xml(doi: str) -> bytes:
     """
     Делает запрос к Elsevier Article Retrieval API
-    и возвращает XML как строку.
+    и возвращает XML как байты (декодирование — после проверки has_fulltext_body).
 
     Бросает исключение, если ответ не 200.
     """
-    api_key = load_api_key()
-    api_base = load_api_base()
-    url = api_base + doi
-
-    headers = {
-        "X-ELS-APIKey": api_key,
-        "Accept": "application/xml",
-        "User-Agent": "elsevier-oa-test-script",
-    }
-
-    response = requests.get(url, headers=headers, timeout=TIMEOUT)
+    url = load_api_base() + doi
+    response = _SESSION.get(url, headers=_elsevier_headers(), timeout=TIMEOUT)
 
     if response.status_code != 200:
         raise RuntimeError(
             f"Elsevier API error {response.status_code}: {response.text[:500]}"
         )
 
-    return response.text
+    return response.content
 
-def has_fulltext_body(xml_text: str) -> bool:
+def has_fulltext_body(xml_bytes: bytes) -> bool:
     """
     Минимальная проверка:
     есть ли в XML признаки полного текста статьи.
+    Ищет по сырым байтам, без декодирования (маркер "<ce:section" покрывает и "<ce:sections").
     """
-    return (
-        "<body" in xml_text
-        or "<ce:section" in xml_text
-        or "<ce:sections" in xml_text
-    )
+    return xml_bytes.find(b"<body") != -1 or xml_bytes.find(b"<ce:section") != -1
 
 def get_elsevier_fulltext_xml(doi: str) -> Optional[str]:
     """
@@ -71,36 +100,97 @@ def get_elsevier_fulltext_xml(doi: str) -> Optional[str]:
     if not has_fulltext_body(xml):
         return None
 
-    return xml
+    return xml.decode("utf-8", errors="replace")
+
+async def afetch_elsevier_xml(doi: str, client: httpx.AsyncClient) -> bytes:
+    """
+    Асинхронная версия fetch_elsevier_xml поверх общего httpx.AsyncClient.
+    На 429/5xx повторяет запрос с экспоненциальной паузой (или по Retry-After).
+    Сетевые ошибки тоже превращаются в RuntimeError.
+    """
+    url = load_api_base() + doi
+    headers = _elsevier_headers()
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = await client.get(url, headers=headers, timeout=TIMEOUT)
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Elsevier request failed: {e!r}") from e
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            break
+        retry_after = response.headers.get("Retry-After", "")
+        delay = float(retry_after) if retry_after.isdigit() else BACKOFF_FACTOR * 2 ** attempt
+        await asyncio.sleep(delay)
+
+    if response.status_code != 200:
+        raise RuntimeError(
+            f"Elsevier API error {response.status_code}: {response.text[:500]}"
+        )
+
+    return response.content
+
+async def aget_elsevier_fulltext_xml(doi: str, client: httpx.AsyncClient) -> Optional[str]:
+    xml = await afetch_elsevier_xml(doi, client)
+
+    if not has_fulltext_body(xml):
+        return None
+
+    return xml.decode("utf-8", errors="replace")
+
+def _write_text_sync(filepath: str, text: str) -> None:
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write(text)
+
+async def _write_text(filepath: str, text: str) -> None:
+    if aiofiles is not None:
+        async with aiofiles.open(filepath, "w", encoding="utf-8") as f:
+            await f.write(text)
+    else:
+        await asyncio.to_thread(_write_text_sync, filepath, text)
+
+async def afetch_all(dois: List[str], xml_dir: str, concurrency: int = CONCURRENCY) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Скачивает full-text XML для списка DOI: `concurrency` воркеров берут DOI из общей очереди.
+    Возвращает (xml_dois, nobody_dois, err_dois), каждый список — в порядке входного `dois`.
+    """
+    results = {"xml": [], "nobody": [], "err": []}   # (idx, doi), сортируются в конце
+    total = len(dois)
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in enumerate(dois, start=1):
+        queue.put_nowait(item)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits) as client:
+        async def fetch_one(idx: int, doi: str) -> str:
+            try:
+                fulltext_xml = await aget_elsevier_fulltext_xml(doi, client)
+            except RuntimeError as rt_err:
+                print(f"[{idx}/{total}] {doi}  Error: {rt_err}")
+                return "err"
+            if fulltext_xml is None:
+                print(f"[{idx}/{total}] {doi}  -> No full-text body found")
+                return "nobody"
+            # Сохранение XML
+            filename = safe_doi(doi) + ".xml"
+            await _write_text(os.path.join(xml_dir, filename), fulltext_xml)
+            print(f"[{idx}/{total}] {doi}  -> Full-text saved: {filename}")
+            return "xml"
+
+        async def worker() -> None:
+            while not queue.empty():
+                idx, doi = queue.get_nowait()
+                results[await fetch_one(idx, doi)].append((idx, doi))
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+
+    return tuple([doi for _, doi in sorted(results[kind])] for kind in ("xml", "nobody", "err"))
 
 if __name__ == "__main__":
     XML_DIR = "../Agentic_data_extraction/elsevier_xml_data"
-    thermo_df = pd.read_csv("./thermo_full_11927.csv")
-    dois = thermo_df["doi_key"].to_list()
-    xml_dois = []
-    nobody_dois = []
-    err_dois = []
+    with open("./thermo_full_11927.csv", newline="", encoding="utf-8") as f:
+        dois = [row["doi_key"] for row in csv.DictReader(f)]
     total = len(dois)
 
-    for idx, doi in enumerate(dois, start=1):
-        print(f"[{idx}/{total}] Processing DOI: {doi}")
-        try:
-            fulltext_xml = get_elsevier_fulltext_xml(doi)
-        except RuntimeError as rt_err:
-            print(f"  Error: {rt_err}")
-            err_dois.append(doi)
-            continue
-        if fulltext_xml is None:
-            print(f"  -> No full-text body found")
-            nobody_dois.append(doi)
-            continue
-        xml_dois.append(doi)
-        # Сохранение XML
-        filename = safe_doi(doi) + ".xml"
-        filepath = os.path.join(XML_DIR, filename)
-        with open(filepath, 'w', encoding='utf-8') as xml_f:
-            xml_f.write(fulltext_xml)
-        print(f"  -> Full-text saved: {filename}")
+    xml_dois, nobody_dois, err_dois = asyncio.run(afetch_all(dois, XML_DIR))
 
     # Вывод статистики
     with_fulltext = len(xml_dois)
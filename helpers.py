@@ -1,56 +1,138 @@
 import re
 import ast
 import json
-import json5
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+__all__ = [
+    "JSONParsingError",
+    "safe_doi",
+    "normalize_quotes",
+    "fast_json_loads",
+    "fast_json_dumps",
+    "robust_json_parse",
+]
+
+_TRAILING_COMMA_RE = re.compile(r',\s*([\]}])')
+_NONE_RE = re.compile(r'\bNone\b')
+_SAFE_DOI_RE = re.compile(r"[^\w\-.]")
 
 class JSONParsingError(Exception):
     pass
 
+@lru_cache(maxsize=4096)
 def safe_doi(doi: str) -> str:
     # Remove "/" and other forbidden chars, keep dots and dashes.
-    return re.sub(r"[^\w\-.]", "", doi)
+    # Memoized: the same DOIs come back on every re-run over a corpus (fetch, then parse)
+    return _SAFE_DOI_RE.sub("", doi)
+
+# “умные” одинарные и двойные кавычки + разные похожие апострофы
+_QUOTES_TABLE = str.maketrans({
+    "\u2018": "'",  # ‘
+    "\u2019": "'",  # ’
+    "\u201A": "'",  # ‚
+    "\u201B": "'",  # ‛
+    "\u2032": "'",  # ′ (prime)
+    "\u2035": "'",  # ‵ (reversed prime)
+    "\u02BC": "'",  # ʼ (modifier letter apostrophe)
+    "\uFF07": "'",  # ＇ (fullwidth apostrophe)
+
+    "\u201C": '"',  # “
+    "\u201D": '"',  # ”
+    "\u201E": '"',  # „
+    "\u201F": '"',  # ‟
+    "\u2033": '"',  # ″ (double prime)
+    "\u2036": '"',  # ‶ (reversed double prime)
+    "\uFF02": '"',  # ＂ (fullwidth quotation mark)
+})
+_SMART_QUOTES = frozenset(chr(c) for c in _QUOTES_TABLE)
 
 def normalize_quotes(s: str) -> str:
-    # “умные” одинарные и двойные кавычки + разные похожие апострофы
-    table = str.maketrans({
-        "\u2018": "'",  # ‘
-        "\u2019": "'",  # ’
-        "\u201A": "'",  # ‚
-        "\u201B": "'",  # ‛
-        "\u2032": "'",  # ′ (prime)
-        "\u2035": "'",  # ‵ (reversed prime)
-        "\u02BC": "'",  # ʼ (modifier letter apostrophe)
-        "\uFF07": "'",  # ＇ (fullwidth apostrophe)
-
-        "\u201C": '"',  # “
-        "\u201D": '"',  # ”
-        "\u201E": '"',  # „
-        "\u201F": '"',  # ‟
-        "\u2033": '"',  # ″ (double prime)
-        "\u2036": '"',  # ‶ (reversed double prime)
-        "\uFF02": '"',  # ＂ (fullwidth quotation mark)
-    })
-    return s.translate(table)
+    # Most texts contain none of them: skip the full translate pass
+    if not any(ch in s for ch in _SMART_QUOTES):
+        return s
+    return s.translate(_QUOTES_TABLE)
+
+def fast_json_loads(text):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def fast_json_dumps(obj) -> str:
+    """Compact JSON string (no spaces, non-ASCII kept as is); uses orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:  # e.g. non-str dict keys, which orjson refuses
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def _extract_json_span(s: str) -> str:
+    """
+    Returns the first balanced {...} or [...] block of `s` in one forward pass
+    (brackets inside "..." strings are ignored). If the block is never closed,
+    everything up to the last closing bracket is returned, as the old greedy regex did.
+    """
+    starts = [i for i in (s.find("{"), s.find("[")) if i >= 0]
+    if not starts:
+        return s
+    i = min(starts)
+    open_c = s[i]
+    close_c = "}" if open_c == "{" else "]"
+    depth = 0
+    in_str = False
+    esc = False
+    for j in range(i, len(s)):
+        c = s[j]
+        if in_str:
+            if esc:
+                esc = False
+            elif c == "\\":
+                esc = True
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c == open_c:
+            depth += 1
+        elif c == close_c:
+            depth -= 1
+            if depth == 0:
+                return s[i:j + 1]
+    end = s.rfind(close_c)
+    return s[i:end + 1] if end > i else s
 
 def robust_json_parse(text: str) -> dict:
     """Tries multiple strategies to recover valid JSON from LLM output."""
     if hasattr(text, "content"):
         text = text.content
-    text = normalize_quotes(text)
 
-    # Strip Markdown formatting
-    text = text.strip().removeprefix("```json").removesuffix("```").strip()
+    # Strip Markdown formatting: find both fence bounds first, then slice once
+    text = text.strip()
+    start = len("```json") if text.startswith("```json") else 0
+    end = len(text) - len("```") if text.endswith("```", start) else len(text)
+    text = text[start:end].strip()
+
+    # Fast path: well-formed JSON needs no cleanup
+    try:
+        return fast_json_loads(text)
+    except ValueError:
+        pass
+
+    text = normalize_quotes(text)
 
     # Try to extract first complete JSON object or array
-    match = re.search(r'(\{.*\}|\[.*\])', text, re.DOTALL)
-    if match:
-        text = match.group(1)
+    text = _extract_json_span(text)
 
     # Clean trailing commas
-    text = re.sub(r',\s*([\]}])', r'\1', text)
+    text = _TRAILING_COMMA_RE.sub(r'\1', text)
 
     # Replace invalid constructs
-    text = text.replace("None", "null")
+    text = _NONE_RE.sub("null", text)   # whole word only: "NoneType", "Nonexistent" stay intact
     text = text.replace("'", '"')
 
     # Try standard JSON parse
@@ -61,6 +143,7 @@ def robust_json_parse(text: str) -> dict:
 
     # Try JSON5
     try:
+        import json5  # imported lazily: only needed when plain JSON fails
         return json5.loads(text)
     except:
         pass
@@ -0,0 +1,92 @@
+import os
+import time
+import hashlib
+import tempfile
+from typing import Any, Callable, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from .helpers import fast_json_dumps, fast_json_loads
+
+class LLMCache(BaseCache):
+    """
+    Disk-backed LangChain cache: one JSON file per response in `cache_dir`.
+    Pass it to a chat model as `ChatOpenAI(..., cache=LLMCache(...))`; the key is
+    SHA-256 over (prompt_version, llm_string, prompt), where llm_string already
+    carries the provider, model name, max_tokens and temperature.
+    If `validate` is given, a hit whose content makes it raise is evicted and
+    reported as a miss, so a malformed response is re-requested instead of replayed.
+    """
+
+    def __init__(self, cache_dir: str, ttl_days: Optional[float] = 7, prompt_version: str = "v1",
+                 validate: Optional[Callable[[str], Any]] = None) -> None:
+        self.cache_dir = cache_dir
+        self.ttl_s = ttl_days * 24 * 3600 if ttl_days else None
+        self.prompt_version = prompt_version
+        self.validate = validate
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, prompt: str, llm_string: str) -> str:
+        h = hashlib.sha256()
+        for part in (self.prompt_version, llm_string, prompt):
+            data = part.encode("utf-8")
+            # 8-byte length prefix: field boundaries can't be shifted to forge a collision
+            h.update(len(data).to_bytes(8, "big"))
+            h.update(data)
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = fast_json_loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if self.ttl_s is not None and time.time() - entry.get("created", 0) > self.ttl_s:
+            self.delete(key)
+            return None
+        return entry.get("content")
+
+    def set(self, key: str, response: str, **metadata: Any) -> None:
+        entry = {"content": response, "created": time.time(), **metadata}
+        # Write to a temp file and rename, so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(fast_json_dumps(entry))
+        os.replace(tmp_path, self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    # === BaseCache interface ===
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        content = self.get(key)
+        if content is None:
+            return None
+        if self.validate is not None:
+            try:
+                self.validate(content)
+            except Exception:
+                self.delete(key)
+                return None
+        return [ChatGeneration(message=AIMessage(content=content))]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if not return_val:
+            return
+        # llm_string (provider, model, parameters) is stored alongside so cache entries can be audited
+        self.set(self.make_key(prompt, llm_string), return_val[0].text, prompt_version=self.prompt_version, llm_string=llm_string)
+
+    def clear(self, **kwargs: Any) -> None:
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -1,3 +1,11 @@
+import re
+from typing import List
+
+try:
+    import re2
+except ImportError:  # google-re2 is optional, fall back to the stdlib re module
+    re2 = None
+
 RETAIN_PATTERNS = [
     # Material name or formula
     r"\bmaterial[s]?\b", r"\bsample[s]?\b", r"\bcompound[s]?\b",
@@ -60,4 +68,23 @@ RETAIN_PATTERNS = [
     # PHYSICAL MEASUREMENTS & PHENOMENA
     r"\bphonon scattering\b", r"\bgrain boundary scattering\b", r"\bbipolar conduction\b",
     r"\bdegenerate semiconductor\b", r"\bsemiconducting behavior\b", r"\bband gap\b", r"\bFermi level\b",
-]
\ No newline at end of file
+]
+
+def _union(patterns: List[str]) -> str:
+    return "|".join(f"(?:{pat})" for pat in patterns)
+
+# All RETAIN_PATTERNS as one alternation: a single scan per sentence instead of one per pattern.
+# With RE2 the scan is a linear-time DFA; RE2's \b is ASCII-only though, so patterns
+# with non-ASCII symbols (σ, ρ, κ, Å, °C) stay on stdlib re in RETAIN_RE_UNICODE.
+if re2 is not None:
+    RETAIN_RE = re2.compile("(?i)" + _union([pat for pat in RETAIN_PATTERNS if pat.isascii()]))
+    RETAIN_RE_UNICODE = re.compile(_union([pat for pat in RETAIN_PATTERNS if not pat.isascii()]), re.IGNORECASE)
+else:
+    RETAIN_RE = re.compile(_union(RETAIN_PATTERNS), re.IGNORECASE)
+    RETAIN_RE_UNICODE = None
+
+def is_retained(sentence: str) -> bool:
+    """True if any of RETAIN_PATTERNS matches the sentence (case-insensitive)."""
+    if RETAIN_RE.search(sentence) is not None:
+        return True
+    return RETAIN_RE_UNICODE is not None and RETAIN_RE_UNICODE.search(sentence) is not None
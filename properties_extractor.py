@@ -1,23 +1,128 @@
+import asyncio
 import datetime
-import json
+import hashlib
 import os
-from typing import Dict, List, Optional, TypedDict
+import re
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, List, Optional, Tuple, TypedDict
 
-from langchain_core.prompts import PromptTemplate
+from langchain_core.messages import AIMessage
 
 from .base_properies_extractor import BasePropertiesExtractor
-from .helpers import robust_json_parse
+from .helpers import fast_json_dumps, robust_json_parse
 
 class PromptNotImplementedError(Exception):
     pass
 
+@lru_cache(maxsize=32)
+def _format_materials_hint(material_names: tuple) -> str:
+    # The same material list is hinted to thermo, structure and table extraction of a paper
+    formatted = ", ".join(f'"{name}"' for name in material_names)
+    return (
+        "Only extract entries for the following materials: "
+        f"{formatted}.\n"
+    )
+
+# Keywords the relevant-text windows are cut around. Symbols are matched case-sensitively
+# (a lone "s" is not the Seebeck coefficient), spelled-out names case-insensitively.
+_THERMO_KEYWORDS = (r"(?-i:ZT|\bS\b|\bPF\b)|σ|ρ|κ|Seebeck|sigma|\brho\b|kappa|figure of merit|power factor"
+                    r"|conductivity|resistivity")
+_STRUCTURE_KEYWORDS = (r"crystal|lattice|space group|phase|structure|dop(?:ed|ing|ant)|synthe|sinter|anneal"
+                       r"|hot[- ]press|ball[- ]mill|spark plasma|melt")
+
+def _relevant_window(fulltext: str, keywords: str, material_names: tuple, radius: int) -> str:
+    """
+    Passages of `fulltext` within `radius` chars of a keyword or material-name hit, overlapping
+    passages merged and the gaps between them elided with "\n...\n". Empty if nothing matches.
+    """
+    pattern = keywords
+    names = [re.escape(name) for name in material_names if name]
+    if names:
+        # Material names are case-sensitive: "Sb" or "X" must not match inside ordinary words
+        pattern += "|(?-i:" + "|".join(names) + ")"
+    spans = []
+    for m in re.finditer(pattern, fulltext, re.IGNORECASE):
+        start, end = max(0, m.start() - radius), m.end() + radius
+        if spans and start <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+    return "\n...\n".join(fulltext[start:end] for start, end in spans)
+
 class PropertiesExtractor(BasePropertiesExtractor):
     THERMO_MAT_LIMIT = 15
+    MATERIALS_PROMPT_DUMP = "material_candidates_prompt.txt"
+    # Re-requests of a combined extraction whose output does not parse, see extract_combined
+    COMBINED_EXTRACTION_RETRIES = 2
+    COMBINED_EXTRACTION_FEEDBACK = (
+        "\n\nYour previous answer could not be used: {error}\n"
+        'Return only one JSON object with the keys "thermo", "structure" and "tables".'
+    )
+    # Max simultaneous LLM requests issued by aextract_all
+    MAX_PARALLEL_LLM_CALLS = 3
+
+    # Cosine-similarity thresholds for the semantic cache, per step; steps not listed are never
+    # served from it. Their outputs are stable under small fulltext changes; the judge is left
+    # out on purpose (a stricter threshold, e.g. 0.995, would be needed there).
+    SEMANTIC_CACHE_THRESHOLDS = {
+        "materials_extraction": 0.95,
+        "structure_properties_extraction": 0.98,
+    }
+    # Materials are looked up by the paper's opening (abstract) only, and a hit must also share
+    # SEMANTIC_CACHE_MIN_OVERLAP of its words with the stored opening
+    SEMANTIC_CACHE_QUERY_CHARS = {"materials_extraction": 2000}
+    SEMANTIC_CACHE_MIN_OVERLAP = {"materials_extraction": 0.8}
+
+    # Judge verdict key (lowercased) -> property list it refers to
+    PROP_MAP = {
+        "zt": "zt_values",
+        "s": "seebeck_coefficient",
+        "seebeck": "seebeck_coefficient",
+        "σ": "electrical_conductivity",
+        "sigma": "electrical_conductivity",
+        "ρ": "electrical_resistivity",
+        "rho": "electrical_resistivity",
+        "pf": "power_factor",
+        "κ": "thermal_conductivity",
+        "kappa": "thermal_conductivity",
+        "zt_values": "zt_values",
+        "seebeck_coefficient": "seebeck_coefficient",
+        "electrical_conductivity": "electrical_conductivity",
+        "electrical_resistivity": "electrical_resistivity",
+        "power_factor": "power_factor",
+        "thermal_conductivity": "thermal_conductivity",
+    }
+    NUMERIC_PROPS = tuple(dict.fromkeys(PROP_MAP.values()))
+    STRUCTURE_FIELDS = ("compound_type", "crystal_structure", "lattice_structure", "space_group", "doping", "processing_method")
+
+    # Without material candidates, a text with none of these is not worth an extraction request
+    _PROPERTY_SIGNS_RE = re.compile(r"\b(?:ZT|Seebeck|power factor|thermoelectric|conductivity|resistivity)|[σρκ]", re.IGNORECASE)
+
+    # str.format conversions (!r, !s, !a) a prompt field may use
+    _PROMPT_CONVERSIONS = {"r": repr, "s": str, "a": ascii}
+
+    # Materials, thermo, structure and judge prompts get only the passages around their keywords,
+    # the hinted material names and, for the judge, the values to verify (RELEVANT_WINDOW_RADIUS
+    # chars on each side), unless those passages still make up more than RELEVANT_WINDOW_MAX_RATIO
+    # of the paper. RELEVANT_WINDOW_RADIUS = 0 always sends the full text.
+    RELEVANT_WINDOW_RADIUS = 400
+    RELEVANT_WINDOW_MAX_RATIO = 0.8
+    RELEVANT_WINDOW_KEYWORDS = {
+        "materials_extraction": _THERMO_KEYWORDS,
+        "thermo_properties_extraction": _THERMO_KEYWORDS,
+        "structure_properties_extraction": _STRUCTURE_KEYWORDS,
+        "judge": _THERMO_KEYWORDS,
+    }
 
     def __init__(self) -> None:
         super().__init__()
 
+        # Last paper's texts, only for hide_*: several papers may run on one extractor at once
+        # (run_batch), so prompts are built from locals and never read these back
         self.fulltext : str = ""
+        # Text actually inserted as {fulltext} per step: the full text or its relevant window
+        self.prompt_fulltexts : Dict[str, str] = {}
         self.combined_block : str = ""
 
         self.materials_extraction_prompt : Optional[str] = None
@@ -40,40 +145,208 @@ class PropertiesExtractor(BasePropertiesExtractor):
         self.table_data_extraction_out : Optional[str] = None
         self.table_data_extraction_llm_output : Optional[str] = None
 
+        self.combined_extraction_prompt : Optional[str] = None
+        self.combined_extraction_in : Optional[str] = None
+        self.combined_extraction_out : Optional[str] = None
+        self.combined_extraction_llm_output : Optional[str] = None
+
         self.judge_prompt : Optional[str] = None
         self.judge_in : Optional[str] = None
         self.judge_out : Optional[str] = None
         self.judge_llm_output : Optional[str] = None
 
+        # (template, parts) per step, see _compile_prompt
+        self._compiled_prompts : Dict[str, tuple] = {}
+
+        # Prompt each saved *_llm_output was produced for: saved outputs are only replayed for the same prompt
+        self._saved_llm_prompts : Dict[str, str] = {}
+
     def reset(self) -> None:
         self.materials_extraction_llm_output = None
         self.thermo_properties_extraction_llm_output = None
         self.structure_properties_extraction_llm_output = None
         self.table_data_extraction_llm_output = None
+        self.combined_extraction_llm_output = None
         self.judge_llm_output = None
+        self._saved_llm_prompts.clear()
 
     def set_materials_extraction_prompt(self, prompt : str) -> None:
         self.materials_extraction_prompt = prompt
+        self._compile_prompt("materials_extraction")
 
     def set_thermo_properties_extraction_prompt(self, prompt : str) -> None:
         self.thermo_properties_extraction_prompt = prompt
+        self._compile_prompt("thermo_properties_extraction")
 
     def set_structure_properties_extraction_prompt(self, prompt : str) -> None:
         self.structure_properties_extraction_prompt = prompt
+        self._compile_prompt("structure_properties_extraction")
 
     def set_table_data_extraction_prompt(self, prompt : str) -> None:
         self.table_data_extraction_prompt = prompt
+        self._compile_prompt("table_data_extraction")
+
+    def set_combined_extraction_prompt(self, prompt : str) -> None:
+        self.combined_extraction_prompt = prompt
+        self._compile_prompt("combined_extraction")
 
     def set_judge_prompt(self, prompt : str) -> None:
         self.judge_prompt = prompt
+        self._compile_prompt("judge")
+
+    def _compile_prompt(self, step: str) -> list:
+        """
+        Splits the step's str.format template into (literal, field, format_spec, conversion) parts once, so that
+        rendering is a single join. {{ }} escapes are resolved here and a malformed template fails at set time.
+        Only named fields are supported ({name}, {name!r}, {name:>10}); positional fields, attribute/index
+        access and nested specs raise ValueError.
+        """
+        prompt = getattr(self, f"{step}_prompt")
+        if prompt is None:
+            raise PromptNotImplementedError(f"{step}_prompt is not yet defined")
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(prompt):
+            if field is not None:
+                if not field.isidentifier():
+                    raise ValueError(f"{step}_prompt: unsupported field {{{field}}}, only named fields are allowed")
+                if spec and "{" in spec:
+                    raise ValueError(f"{step}_prompt: nested format spec in field {{{field}}} is not supported")
+                if conversion is not None and conversion not in self._PROMPT_CONVERSIONS:
+                    raise ValueError(f"{step}_prompt: unknown conversion !{conversion} in field {{{field}}}")
+            parts.append((literal, field, spec or "", self._PROMPT_CONVERSIONS.get(conversion)))
+        self._compiled_prompts[step] = (prompt, parts)
+        return parts
+
+    def _render_prompt(self, step: str, **values) -> str:
+        compiled = self._compiled_prompts.get(step)
+        if compiled is not None and compiled[0] is getattr(self, f"{step}_prompt"):
+            parts = compiled[1]
+        else:
+            # Prompt attribute was assigned directly rather than through its setter
+            parts = self._compile_prompt(step)
+        return "".join([literal if field is None
+                        else literal + format(values[field] if convert is None else convert(values[field]), spec)
+                        for literal, field, spec, convert in parts])
+
+    def _nothing_to_extract(self, step: str, text: str, material_names: Optional[List[str]]) -> bool:
+        if material_names or self._PROPERTY_SIGNS_RE.search(text):
+            return False
+        print(f"No material candidates and no property mentions, skipping {step} node.")
+        return True
 
     def get_materials_hint(self, material_names: List[str]) -> str:
-        formatted = ", ".join(f'"{name}"' for name in material_names)
-        material_hint = (
-            "Only extract entries for the following materials: "
-            f"{formatted}.\n"
-        )
-        return material_hint
+        return _format_materials_hint(tuple(material_names))
+
+    def _get_prompt_fulltext(self, step: str, fulltext: str, material_names: Optional[List[str]] = None,
+                             extra_keywords: str = "") -> str:
+        keywords = self.RELEVANT_WINDOW_KEYWORDS.get(step)
+        if keywords and extra_keywords:
+            keywords += "|" + extra_keywords
+        text = fulltext
+        if keywords and self.RELEVANT_WINDOW_RADIUS > 0 and fulltext:
+            window = _relevant_window(fulltext, keywords, tuple(material_names or ()), self.RELEVANT_WINDOW_RADIUS)
+            if window and len(window) <= self.RELEVANT_WINDOW_MAX_RATIO * len(fulltext):
+                text = window
+        self.prompt_fulltexts[step] = text
+        return text
+
+    # === LLM calls (with replay of saved outputs) ===
+    def _get_saved_llm_output(self, step: str, final_prompt: str):
+        setattr(self, f"{step}_in", final_prompt)
+        saved = getattr(self, f"{step}_llm_output")
+        if saved is not None and self._saved_llm_prompts.get(step) == final_prompt:
+            print(f"Using saved llm output without actual request for {step} node.")
+            return saved
+        return None
+
+    def _save_llm_output(self, step: str, final_prompt: str, output) -> None:
+        setattr(self, f"{step}_llm_output", output)
+        self._saved_llm_prompts[step] = final_prompt
+
+    def _semantic_cache_applies(self, step: str, text: Optional[str]) -> bool:
+        return (self.semantic_cache is not None and self.SEMANTIC_CACHE_THRESHOLDS.get(step) is not None
+                and bool(text))
+
+    def _semantic_lookup(self, step: str, llm, final_prompt: str, text: Optional[str],
+                         query: Optional[str] = None) -> Tuple[Optional[AIMessage], Optional[tuple]]:
+        """
+        Looks `text` (the paper-specific part of the prompt) up in the semantic cache; `query`, if given,
+        is embedded instead (cut to SEMANTIC_CACHE_QUERY_CHARS for the step).
+        Everything else in the prompt, plus the model settings, goes into the namespace and must match exactly.
+        Returns (cached output or None, key for _semantic_store).
+        """
+        if not self._semantic_cache_applies(step, text):
+            return None, None
+        threshold = self.SEMANTIC_CACHE_THRESHOLDS[step]
+        rest = final_prompt.replace(text, "")
+        llm_id = f"{getattr(llm, 'model_name', '')}|{getattr(llm, 'max_tokens', '')}|{getattr(llm, 'temperature', '')}"
+        namespace = f"{step}:{self.PROMPT_VERSION}:" + hashlib.sha256(f"{llm_id}\x00{rest}".encode("utf-8")).hexdigest()
+        query = query or text
+        if step in self.SEMANTIC_CACHE_QUERY_CHARS:
+            query = query[:self.SEMANTIC_CACHE_QUERY_CHARS[step]]
+        vector = self.semantic_cache.embed(query)
+        cached = self.semantic_cache.search(namespace, vector, threshold, text=query,
+                                            min_overlap=self.SEMANTIC_CACHE_MIN_OVERLAP.get(step, 0.0))
+        if cached is not None:
+            print(f"Using semantically cached llm output for {step} node.")
+            return AIMessage(content=cached), None
+        return None, (namespace, vector, query)
+
+    def _semantic_store(self, key: Optional[tuple], output) -> None:
+        if key is None:
+            return
+        try:
+            robust_json_parse(output.content)   # never reuse a response that does not parse
+        except Exception:
+            return
+        namespace, vector, query = key
+        self.semantic_cache.add(namespace, vector, output.content, text=query)
+
+    def _invoke_llm(self, step: str, llm, final_prompt: str, semantic_text: Optional[str] = None,
+                    semantic_query: Optional[str] = None):
+        output = self._get_saved_llm_output(step, final_prompt)
+        if output is None:
+            output, semantic_key = self._semantic_lookup(step, llm, final_prompt, semantic_text, semantic_query)
+            if output is None:
+                output = llm.invoke(final_prompt)
+                self._semantic_store(semantic_key, output)
+        setattr(self, f"{step}_out", output.content)
+        return output
+
+    async def _ainvoke_llm(self, step: str, llm, final_prompt: str, semantic_text: Optional[str] = None,
+                           semantic_query: Optional[str] = None):
+        output = self._get_saved_llm_output(step, final_prompt)
+        if output is None:
+            output, semantic_key = None, None
+            if self._semantic_cache_applies(step, semantic_text):
+                # Embedding is CPU-bound: keep it off the event loop
+                output, semantic_key = await asyncio.to_thread(self._semantic_lookup, step, llm, final_prompt,
+                                                               semantic_text, semantic_query)
+            if output is None:
+                output = await llm.ainvoke(final_prompt)
+                self._semantic_store(semantic_key, output)
+        setattr(self, f"{step}_out", output.content)
+        return output
+
+    def _parse_llm_output(self, step: str, final_prompt: str, output) -> Dict:
+        json_parsed = robust_json_parse(output.content)
+        self._save_llm_output(step, final_prompt, output)
+        return json_parsed
+
+    # === Materials ===
+    def _build_materials_prompt(self, fulltext: str, max_materials: int) -> Tuple[str, str]:
+        """Returns (prompt, text inserted as {fulltext})."""
+        self.fulltext = fulltext
+        text = self._get_prompt_fulltext("materials_extraction", fulltext)
+        final_prompt = self._render_prompt("materials_extraction", fulltext=text, max_materials=max_materials)
+        if os.environ.get("DUMP_PROMPTS"):
+            # Debug aid: keeps the first rendered prompt; mode "x" fails atomically once the file exists
+            try:
+                with open(self.MATERIALS_PROMPT_DUMP, "x", encoding="utf-8") as f:
+                    f.write(final_prompt)
+            except FileExistsError:
+                pass
+        return final_prompt, text
 
     def extract_material_candidates(self, fulltext: str, llm, max_materials: int = 20) -> List[str]:
         """
@@ -81,24 +354,18 @@ class PropertiesExtractor(BasePropertiesExtractor):
         property mentioned nearby in the text (ZT, S, σ, ρ, PF, κ).
         This is a lightweight pre-filter used to seed material hints downstream.
         """
-        self.fulltext = fulltext
-        if self.materials_extraction_prompt is None:
-            raise PromptNotImplementedError("materials_extraction_prompt is not yet defined")
-        prompt = PromptTemplate.from_template(self.materials_extraction_prompt)
-        final_prompt = prompt.format(fulltext=fulltext, max_materials=max_materials)
-        # mp_prompt_f_path = "material_candidates_prompt.txt"
-        # if not os.path.isfile(mp_prompt_f_path):
-        #     with open(mp_prompt_f_path, "w", encoding='utf-8') as f:
-        #         f.write(final_prompt)
-        
-        self.materials_extraction_in = final_prompt
-        if self.materials_extraction_llm_output is not None:
-            print("Using saved llm output without actual request for materials extraction node.")
-            out = self.materials_extraction_llm_output
-        else:
-            out = llm.invoke(final_prompt)
-        self.materials_extraction_out = out.content
-
+        final_prompt, text = self._build_materials_prompt(fulltext, max_materials)
+        # The window goes into the prompt; the cache lookup goes by the paper's opening
+        out = self._invoke_llm("materials_extraction", llm, final_prompt, semantic_text=text, semantic_query=fulltext)
+        return self._parse_material_candidates(final_prompt, out)
+
+    async def aextract_material_candidates(self, fulltext: str, llm, max_materials: int = 20) -> List[str]:
+        final_prompt, text = self._build_materials_prompt(fulltext, max_materials)
+        # The window goes into the prompt; the cache lookup goes by the paper's opening
+        out = await self._ainvoke_llm("materials_extraction", llm, final_prompt, semantic_text=text, semantic_query=fulltext)
+        return self._parse_material_candidates(final_prompt, out)
+
+    def _parse_material_candidates(self, final_prompt: str, out) -> List[str]:
         data = robust_json_parse(out.content)
         mats = data.get("materials", [])
         # Normalize to unique list of non-empty strings
@@ -111,94 +378,196 @@ class PropertiesExtractor(BasePropertiesExtractor):
             if key and key not in seen:
                 seen.add(key)
                 result.append(key)
-        self.materials_extraction_llm_output = out
+        self._save_llm_output("materials_extraction", final_prompt, out)
         return result
 
-    def extract_thermo_properties(self, fulltext: str, llm, material_names: Optional[List[str]] = None) -> Dict:
+    # === Thermoelectric properties ===
+    def _build_thermo_prompt(self, fulltext: str, material_names: Optional[List[str]]) -> str:
         self.fulltext = fulltext
         material_hint = ""
         if material_names:
             material_hint = self.get_materials_hint(material_names)
 
-        if self.thermo_properties_extraction_prompt is None:
-            raise PromptNotImplementedError("thermo_properties_extraction_prompt is not yet defined")
-        prompt = PromptTemplate.from_template(self.thermo_properties_extraction_prompt)
-        final_prompt = prompt.format(fulltext=fulltext, material_hint=material_hint, thermo_mat_limit=self.THERMO_MAT_LIMIT)
+        text = self._get_prompt_fulltext("thermo_properties_extraction", fulltext, material_names)
+        return self._render_prompt("thermo_properties_extraction", fulltext=text, material_hint=material_hint, thermo_mat_limit=self.THERMO_MAT_LIMIT)
 
-        self.thermo_properties_extraction_in = final_prompt
-        if self.thermo_properties_extraction_llm_output is not None:
-            print("Using saved llm output without actual request for therm. properties extraction node.")
-            output = self.thermo_properties_extraction_llm_output
-        else:
-            output = llm.invoke(final_prompt)
-        self.thermo_properties_extraction_out = output.content
-        json_parsed = robust_json_parse(output.content)
-        self.thermo_properties_extraction_llm_output = output
-        return json_parsed
-    
-    def extract_structural_properties(self, fulltext: str, llm, material_names: Optional[List[str]] = None) -> Dict:
+    def extract_thermo_properties(self, fulltext: str, llm, material_names: Optional[List[str]] = None) -> Dict:
+        if self._nothing_to_extract("thermo_properties_extraction", fulltext, material_names):
+            return {"materials": []}
+        final_prompt = self._build_thermo_prompt(fulltext, material_names)
+        output = self._invoke_llm("thermo_properties_extraction", llm, final_prompt)
+        return self._parse_llm_output("thermo_properties_extraction", final_prompt, output)
+
+    async def aextract_thermo_properties(self, fulltext: str, llm, material_names: Optional[List[str]] = None) -> Dict:
+        if self._nothing_to_extract("thermo_properties_extraction", fulltext, material_names):
+            return {"materials": []}
+        final_prompt = self._build_thermo_prompt(fulltext, material_names)
+        output = await self._ainvoke_llm("thermo_properties_extraction", llm, final_prompt)
+        return self._parse_llm_output("thermo_properties_extraction", final_prompt, output)
+
+    # === Structural properties ===
+    def _build_structure_prompt(self, fulltext: str, material_names: Optional[List[str]]) -> Tuple[str, str]:
+        """Returns (prompt, text inserted as {fulltext})."""
         self.fulltext = fulltext
         material_hint = ""
         if material_names:
             material_hint = self.get_materials_hint(material_names)
-        if self.structure_properties_extraction_prompt is None:
-            raise PromptNotImplementedError("structure_properties_extraction_prompt is not yet defined")
-        prompt = PromptTemplate.from_template(self.structure_properties_extraction_prompt)
-        final_prompt = prompt.format(fulltext=fulltext, material_hint=material_hint)
-        self.structure_properties_extraction_in = final_prompt
-        if self.structure_properties_extraction_llm_output is not None:
-            print("Using saved llm output without actual request for structural properties extraction node.")
-            output = self.structure_properties_extraction_llm_output
-        else:
-            output = llm.invoke(final_prompt)
-        self.structure_properties_extraction_out = output.content
-        json_parsed = robust_json_parse(output.content)
-        self.structure_properties_extraction_llm_output = output
-        return json_parsed
+        text = self._get_prompt_fulltext("structure_properties_extraction", fulltext, material_names)
+        return self._render_prompt("structure_properties_extraction", fulltext=text, material_hint=material_hint), text
 
-    def extract_from_tables(self, table_data: list, llm, material_names: Optional[List[str]] = None) -> dict:
-        """Combine all tables and captions, and extract both thermo and structural fields."""
-        if not table_data:
+    def extract_structural_properties(self, fulltext: str, llm, material_names: Optional[List[str]] = None) -> Dict:
+        if self._nothing_to_extract("structure_properties_extraction", fulltext, material_names):
             return {"materials": []}
+        final_prompt, text = self._build_structure_prompt(fulltext, material_names)
+        output = self._invoke_llm("structure_properties_extraction", llm, final_prompt, semantic_text=text)
+        return self._parse_llm_output("structure_properties_extraction", final_prompt, output)
 
+    async def aextract_structural_properties(self, fulltext: str, llm, material_names: Optional[List[str]] = None) -> Dict:
+        if self._nothing_to_extract("structure_properties_extraction", fulltext, material_names):
+            return {"materials": []}
+        final_prompt, text = self._build_structure_prompt(fulltext, material_names)
+        output = await self._ainvoke_llm("structure_properties_extraction", llm, final_prompt, semantic_text=text)
+        return self._parse_llm_output("structure_properties_extraction", final_prompt, output)
+
+    # === Tables ===
+    def _build_tables_prompt(self, table_data: list, material_names: Optional[List[str]]) -> Tuple[str, str]:
+        """Returns (prompt, combined block of the tables)."""
         # Material hint
         material_hint = ""
         if material_names:
             material_hint = self.get_materials_hint(material_names)
 
-        # Combine all tables into one long string
-        combined_block = ""
-        for i, table in enumerate(table_data, 1):
-            combined_block += f"### Table {i} Caption:\n{table['caption']}\n\n"
-            combined_block += f"### Table {i} CSV Data:\n{json.dumps(table['rows'], indent=2)}\n\n"
+        # Prompt
+        combined_block = self._build_combined_block(table_data)
+        return self._render_prompt("table_data_extraction", material_hint=material_hint, combined_block=combined_block), combined_block
+
+    def _build_combined_block(self, table_data: list) -> str:
+        # Combine all tables into one long string (joined once: no quadratic re-copying)
+        combined_block = "".join([
+            f"### Table {i} Caption:\n{table['caption']}\n\n"
+            f"### Table {i} CSV Data:\n{fast_json_dumps(table['rows'])}\n\n"
+            for i, table in enumerate(table_data, 1)
+        ])
         self.combined_block = combined_block
+        return combined_block
 
-        # Prompt
-        if self.table_data_extraction_prompt is None:
-            raise PromptNotImplementedError("table_data_extraction_prompt is not yet defined")
-        final_prompt = self.table_data_extraction_prompt.format(material_hint = material_hint, combined_block = combined_block)
+    def extract_from_tables(self, table_data: list, llm, material_names: Optional[List[str]] = None) -> dict:
+        """Combine all tables and captions, and extract both thermo and structural fields."""
+        if not table_data:
+            return {"materials": []}
+
+        final_prompt, combined_block = self._build_tables_prompt(table_data, material_names)
+        if self._nothing_to_extract("table_data_extraction", combined_block, material_names):
+            return {"materials": []}
         try:
-            self.table_data_extraction_in = final_prompt
-            if self.table_data_extraction_llm_output is not None:
-                print("Using saved llm output without actual request for table data extraction node.")
-                output = self.table_data_extraction_llm_output
-            else:
-                output = llm.invoke(final_prompt)
-            self.table_data_extraction_out = output.content
+            output = self._invoke_llm("table_data_extraction", llm, final_prompt)
+            return self._parse_llm_output("table_data_extraction", final_prompt, output)
+        except Exception as e:
+            print("❌ Table extraction failed:", e)
+            return {"materials": []}
 
-            json_parsed = robust_json_parse(output.content)
-            self.table_data_extraction_llm_output = output
-            return json_parsed
+    async def aextract_from_tables(self, table_data: list, llm, material_names: Optional[List[str]] = None) -> dict:
+        if not table_data:
+            return {"materials": []}
+
+        final_prompt, combined_block = self._build_tables_prompt(table_data, material_names)
+        if self._nothing_to_extract("table_data_extraction", combined_block, material_names):
+            return {"materials": []}
+        try:
+            output = await self._ainvoke_llm("table_data_extraction", llm, final_prompt)
+            return self._parse_llm_output("table_data_extraction", final_prompt, output)
         except Exception as e:
             print("❌ Table extraction failed:", e)
             return {"materials": []}
 
+    # === All independent extractions at once ===
+    async def aextract_all(self, fulltext: str, table_data: list, llm, material_names: Optional[List[str]] = None) -> Tuple[Dict, Dict, Dict]:
+        """
+        Runs thermo, structure and table extraction concurrently (they share no data),
+        at most MAX_PARALLEL_LLM_CALLS at a time. Returns (thermo, structure, tables).
+        """
+        sem = asyncio.Semaphore(self.MAX_PARALLEL_LLM_CALLS)
+
+        async def _limited(coro):
+            async with sem:
+                return await coro
+
+        thermo, structure, tables = await asyncio.gather(
+            _limited(self.aextract_thermo_properties(fulltext, llm, material_names)),
+            _limited(self.aextract_structural_properties(fulltext, llm, material_names)),
+            _limited(self.aextract_from_tables(table_data, llm, material_names)),
+        )
+        return thermo, structure, tables
+
+    def extract_all(self, fulltext: str, table_data: list, llm, material_names: Optional[List[str]] = None) -> Tuple[Dict, Dict, Dict]:
+        return asyncio.run(self.aextract_all(fulltext, table_data, llm, material_names))
+
+    # === Thermo + structure + tables in a single request ===
+    def _build_combined_prompt(self, fulltext: str, table_data: list, material_names: Optional[List[str]]) -> str:
+        self.fulltext = fulltext
+        material_hint = ""
+        if material_names:
+            material_hint = self.get_materials_hint(material_names)
+        combined_block = self._build_combined_block(table_data or [])
+        return self._render_prompt("combined_extraction", fulltext=fulltext, material_hint=material_hint,
+                                   thermo_mat_limit=self.THERMO_MAT_LIMIT, combined_block=combined_block)
+
+    @staticmethod
+    def _split_combined_output(data) -> Tuple[Dict, Dict, Dict]:
+        if not isinstance(data, dict):
+            raise ValueError("the output is not a JSON object")
+        parts = []
+        for key in ("thermo", "structure", "tables"):
+            part = data.get(key) or {"materials": []}
+            if not isinstance(part, dict) or not isinstance(part.get("materials", []), list):
+                raise ValueError(f'"{key}" must be an object with a "materials" list')
+            parts.append(part)
+        return tuple(parts)
+
+    def extract_combined(self, fulltext: str, table_data: list, llm, material_names: Optional[List[str]] = None) -> Tuple[Dict, Dict, Dict]:
+        """
+        Single-request alternative to extract_all: the paper text is sent once instead of once per extraction.
+        An output that does not parse is re-requested with the error appended, up to COMBINED_EXTRACTION_RETRIES times.
+        Returns (thermo, structure, tables).
+        """
+        final_prompt = self._build_combined_prompt(fulltext, table_data, material_names)
+        prompt = final_prompt
+        for attempt in range(self.COMBINED_EXTRACTION_RETRIES + 1):
+            output = self._invoke_llm("combined_extraction", llm, prompt)
+            try:
+                result = self._split_combined_output(robust_json_parse(output.content))
+            except Exception as e:
+                if attempt == self.COMBINED_EXTRACTION_RETRIES:
+                    raise
+                print(f"⚠️ Combined extraction output rejected ({e!r}), retrying.")
+                prompt = final_prompt + self.COMBINED_EXTRACTION_FEEDBACK.format(error=repr(e))
+                continue
+            self._save_llm_output("combined_extraction", prompt, output)
+            return result
+
+    async def aextract_combined(self, fulltext: str, table_data: list, llm, material_names: Optional[List[str]] = None) -> Tuple[Dict, Dict, Dict]:
+        final_prompt = self._build_combined_prompt(fulltext, table_data, material_names)
+        prompt = final_prompt
+        for attempt in range(self.COMBINED_EXTRACTION_RETRIES + 1):
+            output = await self._ainvoke_llm("combined_extraction", llm, prompt)
+            try:
+                result = self._split_combined_output(robust_json_parse(output.content))
+            except Exception as e:
+                if attempt == self.COMBINED_EXTRACTION_RETRIES:
+                    raise
+                print(f"⚠️ Combined extraction output rejected ({e!r}), retrying.")
+                prompt = final_prompt + self.COMBINED_EXTRACTION_FEEDBACK.format(error=repr(e))
+                continue
+            self._save_llm_output("combined_extraction", prompt, output)
+            return result
+
     def judge_verify_properties(self, fulltext: str, thermo_json: dict = None, structure_json: dict = None, table_json: dict = None, llm=None, folder_name: str = None) -> dict:
         """
         Validates thermoelectric numeric values (ZT, S, σ, ρ, PF, κ) and their temperature context
         against the full text and table data.  Also confirms each material has valid structural fields.
         Keeps all materials; removes only numeric values judged incorrect or temperature-mismatched.
-        Logs [ok], [removed], [temp-mismatch], and [structure_ok] to judge_validation_log.txt.
+        Logs [ok], [removed], [temp-mismatch], and [structure_ok] to judge_validation_log.txt
+        ([structure_unverified] when there are no numeric values and the judge is not asked).
         """
 
         # --- Merge all extracted JSON blocks ---
@@ -210,6 +579,14 @@ class PropertiesExtractor(BasePropertiesExtractor):
         if not merged["materials"]:
             return {"materials": [], "deleted": [], "notes": "No materials to judge."}
 
+        # No numeric values: nothing to remove, so the judge is not asked; the structural fields stay unverified
+        if not any(mat.get(prop) for mat in merged["materials"] for prop in self.NUMERIC_PROPS):
+            self._log_validation(folder_name, [
+                f"[structure_unverified] {mat.get('name', '')}" for mat in merged["materials"]
+                if any(mat.get(field) is not None for field in self.STRUCTURE_FIELDS)
+            ])
+            return {"materials": merged["materials"], "notes": "No numeric values to judge."}
+
         # --- Build table context (captions + rows) if available ---
         table_context = ""
         try:
@@ -221,25 +598,18 @@ class PropertiesExtractor(BasePropertiesExtractor):
             all_tables = []
 
         if all_tables:
-            table_context += "\n\n### Table Contexts (from paper):\n"
-            for i, t in enumerate(all_tables, 1):
-                caption = t.get("caption", "")
-                rows = json.dumps(t.get("rows", []), indent=2)
-                table_context += f"\nTable {i} Caption:\n{caption}\n\nRows:\n{rows}\n"
+            table_context = "\n\n### Table Contexts (from paper):\n" + "".join([
+                f"\nTable {i} Caption:\n{t.get('caption', '')}\n\nRows:\n{fast_json_dumps(t.get('rows', []))}\n"
+                for i, t in enumerate(all_tables, 1)
+            ])
 
         # --- Prompt: thermoelectric numeric + temperature + structural verification ---
-        if self.judge_prompt is None:
-            raise PromptNotImplementedError("judge_prompt is not yet defined")
-        final_prompt = PromptTemplate.from_template(self.judge_prompt).format(fulltext=fulltext,table_context=table_context,merged_json=json.dumps(merged, indent=2))
+        material_names = [mat["name"] for mat in merged["materials"] if isinstance(mat.get("name"), str)]
+        text = self._get_prompt_fulltext("judge", fulltext, material_names, self._numeric_values_pattern(merged["materials"]))
+        final_prompt = self._render_prompt("judge", fulltext=text, table_context=table_context, merged_json=fast_json_dumps(merged))
 
         # --- Run model ---
-        self.judge_in = final_prompt
-        if self.judge_llm_output is not None:
-            print("Using saved llm output without actual request for judge node.")
-            res = self.judge_llm_output
-        else:
-            res = llm.invoke(final_prompt)
-        self.judge_out = res.content
+        res = self._invoke_llm("judge", llm, final_prompt)
 
         # --- Parse output safely ---
         try:
@@ -250,16 +620,18 @@ class PropertiesExtractor(BasePropertiesExtractor):
             correct = verdict.get("correct", {}) or {}
             incorrect = verdict.get("incorrect", {}) or {}
             temp_mismatch = verdict.get("temp_mismatch", {}) or {}
-            structure_ok = verdict.get("structure_ok", []) or []
+            # Names only: a set makes the per-material membership test O(1)
+            structure_ok = {ok for ok in verdict.get("structure_ok", []) or [] if isinstance(ok, str)}
             notes = verdict.get("notes", "")
         except Exception as e:
-            with open("judge_error_log.txt", "a", encoding="utf-8") as log:
-                log.write("\n" + "=" * 60 + "\n")
-                log.write(f"TIME: {datetime.datetime.now().isoformat()}\n")
-                log.write(f"FOLDER: {folder_name or os.getcwd()}\n")
-                log.write(f"ERROR: {repr(e)}\n")
-                log.write(f"RAW OUTPUT:\n{res.content if hasattr(res, 'content') else str(res)}\n")
-                log.write("=" * 60 + "\n")
+            self._judge_logger.error(
+                "\n" + "=" * 60 + "\n"
+                f"TIME: {datetime.datetime.now().isoformat()}\n"
+                f"FOLDER: {folder_name or os.getcwd()}\n"
+                f"ERROR: {repr(e)}\n"
+                f"RAW OUTPUT:\n{res.content if hasattr(res, 'content') else str(res)}\n"
+                + "=" * 60
+            )
             print(f"⚠️ Judge parsing failed → {e}")
             return merged  # fallback: keep everything
 
@@ -276,71 +648,116 @@ class PropertiesExtractor(BasePropertiesExtractor):
 
             # Remove incorrect numeric values
             for key, bad_values in mat_incorrect.items():
-                for prop_key in list(mat.keys()):
-                    if key.lower() in prop_key.lower() and isinstance(mat[prop_key], list):
-                        before = len(mat[prop_key])
-                        mat[prop_key] = [
-                            v for v in mat[prop_key]
-                            if not any(
-                                (isinstance(bad, (int, float)) and bad == v.get("value"))
-                                or (isinstance(bad, (int, float)) and bad == v.get(f"{key}_value"))
-                                for bad in bad_values
-                            )
-                        ]
-                        after = len(mat[prop_key])
-                        if before > after:
-                            for val in bad_values:
-                                log_lines.append(f"[removed] {name}.{key}={val}")
+                prop_key = self.PROP_MAP.get(key.lower())
+                if prop_key is None or not isinstance(mat.get(prop_key), list):
+                    continue
+                bad_set = {bad for bad in bad_values if isinstance(bad, (int, float))}
+                value_key = f"{key}_value"
+                before = len(mat[prop_key])
+                mat[prop_key] = [
+                    v for v in mat[prop_key]
+                    if not (self._is_listed(v.get("value"), bad_set) or self._is_listed(v.get(value_key), bad_set))
+                ]
+                after = len(mat[prop_key])
+                if before > after:
+                    for val in bad_values:
+                        log_lines.append(f"[removed] {name}.{key}={val}")
 
             # Remove temperature-mismatched values
             for key, mismatch_list in mat_temp_mismatch.items():
-                for prop_key in list(mat.keys()):
-                    if key.lower() in prop_key.lower() and isinstance(mat[prop_key], list):
-                        for bad in mismatch_list:
-                            val = bad.get("value")
-                            mat[prop_key] = [
-                                v for v in mat[prop_key]
-                                if val != v.get("value") and val != v.get(f"{key}_value")
-                            ]
-                            log_lines.append(f"[temp-mismatch] {name}.{key} value={val} "
-                                            f"reported_T={bad.get('reported_T')} found_T={bad.get('found_T')}")
+                prop_key = self.PROP_MAP.get(key.lower())
+                if prop_key is None or not isinstance(mat.get(prop_key), list):
+                    continue
+                # An entry without a value must not match every measurement that lacks one
+                mismatch_vals = [bad.get("value") for bad in mismatch_list if bad.get("value") is not None]
+                bad_vals = {val for val in mismatch_vals if self._is_hashable(val)}
+                bad_unhashable = [val for val in mismatch_vals if not self._is_hashable(val)]
+                value_key = f"{key}_value"
+                mat[prop_key] = [
+                    v for v in mat[prop_key]
+                    if not (self._is_listed(v.get("value"), bad_vals, bad_unhashable)
+                            or self._is_listed(v.get(value_key), bad_vals, bad_unhashable))
+                ]
+                for bad in mismatch_list:
+                    log_lines.append(f"[temp-mismatch] {name}.{key} value={bad.get('value')} "
+                                    f"reported_T={bad.get('reported_T')} found_T={bad.get('found_T')}")
 
             # Log correct and structural info
             for key, ok_values in mat_correct.items():
                 for val in ok_values:
                     log_lines.append(f"[ok] {name}.{key}={val}")
 
-            if name in structure_ok:
+            if isinstance(name, str) and name in structure_ok:
                 log_lines.append(f"[structure_ok] {name}")
 
             cleaned.append(mat)
 
-        # --- Write validation log ---
-        with open("judge_validation_log.txt", "a", encoding="utf-8") as log:
-            log.write("\n" + "=" * 60 + "\n")
-            log.write(f"TIME: {datetime.datetime.now().isoformat()}\n")
-            log.write(f"FOLDER: {folder_name or os.path.basename(os.getcwd())}\n")
-            log.write("\n".join(log_lines))
-            log.write("\n" + "=" * 60 + "\n")
-
-        print(f"🧾 Judge log: {len(log_lines)} entries validated for this folder.")
-        self.judge_llm_output = res
+        self._log_validation(folder_name, log_lines)
+        self._save_llm_output("judge", final_prompt, res)
         return {"materials": cleaned, "notes": notes}
 
-    def hide_fulltext(self, text : str, n : int = 30) -> str:
-        if not self.fulltext:
-            return text  # чтобы не делать бесконечные "вхождения" пустой строки
+    def _log_validation(self, folder_name: Optional[str], log_lines: List[str]) -> None:
+        self._validation_logger.info(
+            "\n" + "=" * 60 + "\n"
+            f"TIME: {datetime.datetime.now().isoformat()}\n"
+            f"FOLDER: {folder_name or os.path.basename(os.getcwd())}\n"
+            + "\n".join(log_lines)
+            + "\n" + "=" * 60
+        )
+        print(f"🧾 Judge log: {len(log_lines)} entries validated for this folder.")
 
-        if self.fulltext in text:
-            shortened = self.fulltext if len(self.fulltext) <= 2 * n else (self.fulltext[:n] + "... FILTERED ARTICLE TEXT ..." + self.fulltext[-n:])
-            return text.replace(self.fulltext, shortened)
+    def _numeric_values_pattern(self, materials: list) -> str:
+        """Regex alternation matching the numeric values extracted for `materials`, as standalone numbers."""
+        values = set()
+        for mat in materials:
+            for prop in self.NUMERIC_PROPS:
+                entries = mat.get(prop)
+                if not isinstance(entries, list):
+                    continue
+                for entry in entries:
+                    if not isinstance(entry, dict):
+                        continue
+                    for field, value in entry.items():
+                        if field.endswith("value") and isinstance(value, (int, float)) and not isinstance(value, bool):
+                            values.add(f"{value:g}")
+        if not values:
+            return ""
+        return r"(?<![\d.])(?:" + "|".join(re.escape(v) for v in sorted(values)) + r")(?!\.?\d)"
+
+    @staticmethod
+    def _is_hashable(value) -> bool:
+        try:
+            hash(value)
+        except TypeError:
+            return False
+        return True
+
+    @staticmethod
+    def _is_listed(value, values: set, unhashable_values: list = ()) -> bool:
+        # Set membership; unhashable values (lists/dicts from the LLM) can only equal other unhashables
+        try:
+            return value in values
+        except TypeError:
+            return value in unhashable_values
 
+    def hide_fulltext(self, text : str, n : int = 30) -> str:
+        # The full text itself plus any relevant windows cut from it
+        for fulltext in dict.fromkeys([self.fulltext, *self.prompt_fulltexts.copy().values()]):
+            if not fulltext:
+                continue  # чтобы не делать бесконечные "вхождения" пустой строки
+
+            # str.replace returns the text unchanged when the needle is absent: no separate `in` scan needed
+            shortened = fulltext if len(fulltext) <= 2 * n else (fulltext[:n] + "... FILTERED ARTICLE TEXT ..." + fulltext[-n:])
+            text = text.replace(fulltext, shortened)
         return text
     
     def hide_combined_block(self, text : str, n : int = 30) -> str:
         if not self.combined_block:
             return text  # чтобы не делать бесконечные "вхождения" пустой строки
 
-        if self.combined_block in text:
-            shortened = self.combined_block if len(self.combined_block) <= 2 * n else (self.combined_block[:n] + "... TABLES COMBINED BLOCK ..." + self.combined_block[-n:])
-            return text.replace(self.combined_block, shortened)
+        shortened = self.combined_block if len(self.combined_block) <= 2 * n else (self.combined_block[:n] + "... TABLES COMBINED BLOCK ..." + self.combined_block[-n:])
+        return text.replace(self.combined_block, shortened)
+
+    def hide_all(self, text : str, n : int = 30) -> str:
+        # The fulltext goes first: the combined-block scan then runs over the already shortened text
+        return self.hide_combined_block(self.hide_fulltext(text, n), n)
@@ -22,7 +22,6 @@ MATERIALS_EXTRACTION_REF_PROMPT = """
 
 THERMO_PROPERTIES_EXTRACTION_REF_PROMPT = """
     You are a research extraction agent for thermoelectric materials.
-    {material_hint}
     Extract per-material properties:
     - name only, nothing extra string labels.
     - ZT (figure of merit)
@@ -60,13 +59,13 @@ THERMO_PROPERTIES_EXTRACTION_REF_PROMPT = """
     ]
     }}
 
+    {material_hint}
     Text:
     ```{fulltext}```
 """.strip()
 
 STRUCTURE_PROPERTIES_EXTRACTION_REF_PROMPT = """
     You are a structural extraction agent for thermoelectric materials.
-    {material_hint}
     For each material, extract:
     - name only, nothing extra string labels.
     - compound_type, crystal_structure, lattice_structure
@@ -100,13 +99,13 @@ STRUCTURE_PROPERTIES_EXTRACTION_REF_PROMPT = """
     ]
     }}
 
+    {material_hint}
     Text:
     ```{fulltext}```
 """.strip()
 
 TABLE_DATA_EXTRACTION_REF_PROMPT = """
     You are a scientific table extraction agent working on thermoelectric materials.
-    {material_hint}
     Below is a collection of tables and their captions from a scientific paper.
 
     Extract all materials mentioned across the tables and return the following properties for each:
@@ -162,6 +161,89 @@ TABLE_DATA_EXTRACTION_REF_PROMPT = """
 
     All missing values must be explicitly set as null strictly.
 
+    {material_hint}
+    ### Tables and Captions:
+    {combined_block}
+""".strip()
+
+COMBINED_EXTRACTION_REF_PROMPT = """
+    You are a research extraction agent for thermoelectric materials.
+    From the paper text and the tables below, produce three independent extractions at once:
+
+    1. "thermo": per-material thermoelectric properties found in the text:
+    ZT, σ (electrical conductivity), S (Seebeck coefficient), PF (power factor),
+    κ (thermal conductivity), ρ (electrical resistivity), each with **numeric values**,
+    **temperature** and **units** if mentioned.
+    If more than {thermo_mat_limit} materials are found, include only the first {thermo_mat_limit}.
+
+    2. "structure": per-material structural fields found in the text:
+    compound_type, crystal_structure, lattice_structure, space_group,
+    doping_type and list of dopants, processing_method.
+    If more than 10 materials are found, include only the first 10.
+
+    3. "tables": all materials in the tables with both the thermoelectric and the structural fields above.
+    If more than 10 materials are found, include only the first 10.
+
+    Instructions:
+    - Set missing values to null strictly.
+    - Only include materials name nothing extra string labels.
+    - Don't do any calculation or unit conversion on your own.
+    - If multiple values exist, return all of them as separate dictionary entries.
+    - All field names and string values must use **valid JSON syntax** (double quotes).
+    - Keep numerical values unquoted (i.e., not strings).
+    - If there are no tables, return an empty "materials" list for "tables".
+    - Nothing else should be included in the output strictly.
+
+    Return structured JSON:
+    {{
+    "thermo": {{
+        "materials": [
+            {{
+            "name": "...",
+            "zt_values": [{{"value": ..., "ZT_temperature": ..., "ZT_temperature_unit": "..."}}],
+            "electrical_conductivity": [{{"σ_value": ..., "σ_unit": "...", "σ_Temperature": "...", "σ_Temp_unit": "..."}}],
+            "electrical_resistivity": [{{"ρ_value": ..., "ρ_unit": "...", "ρ_Temperature": "...", "ρ_Temp_unit": "..."}}],
+            "seebeck_coefficient": [{{"S_value": ..., "S_unit": "...",  "S_Temperature": "...", "S_Temp_unit": "..."}}],
+            "power_factor": [{{"PF_value": ..., "PF_unit": "...", "PF_Temperature": "...", "PF_Temp_unit": "..."}}],
+            "thermal_conductivity": [{{"κ_value": ..., "κ_unit": "...", "κ_Temperature": "...", "κ_Temp_unit": "..."}}]
+            }}
+        ]
+    }},
+    "structure": {{
+        "materials": [
+            {{
+            "name": "...",
+            "compound_type": "<type|null>",
+            "crystal_structure": "<structure|null>",
+            "lattice_structure": "<structure|null>",
+            "space_group": "<group|null>",
+            "doping": {{
+                "doping_type": "<type|null>",
+                "dopants": [<strings>]
+            }},
+            "processing_method": "<string|null>"
+            }}
+        ]
+    }},
+    "tables": {{
+        "materials": [
+            {{
+            "name": "...",
+            "zt_values": [...], "electrical_conductivity": [...], "electrical_resistivity": [...],
+            "seebeck_coefficient": [...], "power_factor": [...], "thermal_conductivity": [...],
+            "compound_type": "<type|null>", "crystal_structure": "<structure|null>",
+            "lattice_structure": "<structure|null>", "space_group": "<group|null>",
+            "doping": {{"doping_type": "<type|null>", "dopants": [<strings>]}},
+            "processing_method": "<string|null>"
+            }}
+        ]
+    }}
+    }}
+
+    {material_hint}
+    Text:
+    ```{fulltext}```
+
     ### Tables and Captions:
     {combined_block}
 """.strip()
@@ -0,0 +1,82 @@
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # sentence-transformers is optional, only needed when the semantic cache is enabled
+    SentenceTransformer = None
+
+class SemanticCache:
+    """
+    In-memory nearest-neighbour cache of LLM responses.
+    Entries are grouped by namespace (everything that must match exactly: step, prompt
+    template, material hint, model...); within a namespace a stored response is reused
+    when the cosine similarity of the embedded texts reaches the caller's threshold and,
+    if asked for, the two texts also share enough of their words.
+    """
+
+    # Small encoders truncate their input (~256 tokens for MiniLM), so long texts are
+    # embedded window by window and the normalized window vectors are averaged.
+    WINDOW_CHARS = 1000
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", embedder=None) -> None:
+        if embedder is None:
+            if SentenceTransformer is None:
+                raise ImportError("SemanticCache needs sentence-transformers: pip install sentence-transformers")
+            embedder = SentenceTransformer(model_name)
+        self.embedder = embedder
+        self._vectors : Dict[str, np.ndarray] = {}
+        self._values : Dict[str, List[str]] = {}
+        self._words : Dict[str, List[Optional[frozenset]]] = {}
+        self._lock = threading.Lock()
+
+    def embed(self, text: str) -> np.ndarray:
+        windows = [text[i:i + self.WINDOW_CHARS] for i in range(0, len(text), self.WINDOW_CHARS)] or [""]
+        vecs = np.asarray(self.embedder.encode(windows, normalize_embeddings=True), dtype=np.float32)
+        vec = vecs.mean(axis=0)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    @staticmethod
+    def word_overlap(a: frozenset, b: frozenset) -> float:
+        return len(a & b) / max(len(a), len(b), 1)
+
+    def search(self, namespace: str, vector: np.ndarray, threshold: float,
+               text: Optional[str] = None, min_overlap: float = 0.0) -> Optional[str]:
+        """
+        Returns the most similar stored response if its similarity is >= threshold.
+        With min_overlap > 0, candidates whose stored text shares less than that fraction
+        of words with `text` are skipped (the next most similar one is tried).
+        """
+        with self._lock:
+            vectors = self._vectors.get(namespace)
+            if vectors is None:
+                return None
+            sims = vectors @ vector
+            if min_overlap <= 0:
+                best = int(np.argmax(sims))
+                return self._values[namespace][best] if sims[best] >= threshold else None
+            words = frozenset(text.split()) if text else frozenset()
+            for idx in np.argsort(-sims):
+                if sims[idx] < threshold:
+                    break
+                stored = self._words[namespace][idx]
+                if stored is not None and self.word_overlap(words, stored) >= min_overlap:
+                    return self._values[namespace][idx]
+        return None
+
+    def add(self, namespace: str, vector: np.ndarray, value: str, text: Optional[str] = None) -> None:
+        """`text` is only kept (as a word set) for searches with min_overlap."""
+        with self._lock:
+            vectors = self._vectors.get(namespace)
+            self._vectors[namespace] = vector[None, :] if vectors is None else np.vstack([vectors, vector])
+            self._values.setdefault(namespace, []).append(value)
+            self._words.setdefault(namespace, []).append(frozenset(text.split()) if text is not None else None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors.clear()
+            self._values.clear()
+            self._words.clear()
@@ -0,0 +1,44 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+# The repository root is itself the package (modules use relative imports),
+# so it is imported under its directory name from the parent directory.
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(REPO_DIR))
+PACKAGE = os.path.basename(REPO_DIR)
+
+
+def load(module: str):
+    return importlib.import_module(f"{PACKAGE}.{module}")
+
+
+@pytest.fixture(scope="session")
+def base_module():
+    return load("base_properies_extractor")
+
+
+@pytest.fixture(scope="session")
+def xml_module():
+    return load("xml_paper_parser")
+
+
+@pytest.fixture(scope="session")
+def properties_module():
+    return load("properties_extractor")
+
+
+@pytest.fixture(scope="session")
+def fetch_module():
+    return load("fetch_papers")
+
+
+@pytest.fixture
+def extractor(properties_module, monkeypatch, tmp_path):
+    for name in ("OPENAI_MODEL", "OPENAI_BASE_URL", "OPENAI_API_KEY"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setenv("EXTRACTION_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    return properties_module.PropertiesExtractor()
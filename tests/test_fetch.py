@@ -0,0 +1,30 @@
+import asyncio
+
+
+def test_afetch_all_keeps_input_order_with_bounded_workers(fetch_module, monkeypatch, tmp_path):
+    in_flight, peak = 0, 0
+
+    async def fake_fetch(doi, client):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        n = int(doi.split("/")[1])
+        await asyncio.sleep((20 - n) / 1000)   # later DOIs finish first
+        in_flight -= 1
+        if n % 5 == 0:
+            raise RuntimeError("boom")
+        return None if n % 3 == 0 else "<xml/>"
+
+    async def fake_write(path, text):
+        pass
+
+    monkeypatch.setattr(fetch_module, "aget_elsevier_fulltext_xml", fake_fetch)
+    monkeypatch.setattr(fetch_module, "_write_text", fake_write)
+    dois = [f"10.1/{n}" for n in range(1, 20)]
+
+    xml, nobody, err = asyncio.run(fetch_module.afetch_all(dois, str(tmp_path), concurrency=4))
+
+    assert err == [d for d in dois if int(d.split("/")[1]) % 5 == 0]
+    assert nobody == [d for d in dois if int(d.split("/")[1]) % 5 and int(d.split("/")[1]) % 3 == 0]
+    assert xml == [d for d in dois if d not in err and d not in nobody]
+    assert peak == 4
@@ -0,0 +1,18 @@
+class NoCallLLM:
+    def invoke(self, prompt):
+        raise AssertionError("the judge must not be asked")
+
+
+def test_no_numeric_values_skips_llm_and_logs_unverified(extractor, monkeypatch):
+    logged = []
+    monkeypatch.setattr(extractor, "_log_validation", lambda folder, lines: logged.extend(lines))
+    structure = {"materials": [
+        {"name": "SnSe", "crystal_structure": "orthorhombic", "zt_values": []},
+        {"name": "PbTe", "space_group": None},
+        {"name": "Bi2Te3"},
+    ]}
+
+    judged = extractor.judge_verify_properties("SnSe text", structure_json=structure, llm=NoCallLLM(), folder_name="p")
+
+    assert judged["materials"] == structure["materials"]
+    assert logged == ["[structure_unverified] SnSe"]
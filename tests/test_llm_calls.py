@@ -0,0 +1,52 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import AIMessage
+
+
+class EchoLLM:
+    async def ainvoke(self, prompt):
+        return AIMessage(content='{"materials": []}')
+
+
+def test_no_thread_hop_without_semantic_cache(extractor, monkeypatch):
+    def no_thread(*args, **kwargs):
+        raise AssertionError("no semantic lookup to run off the event loop")
+    monkeypatch.setattr(asyncio, "to_thread", no_thread)
+    assert extractor.semantic_cache is None
+
+    out = asyncio.run(extractor._ainvoke_llm("materials_extraction", EchoLLM(), "prompt", semantic_text="text"))
+    assert out.content == '{"materials": []}'
+
+
+class RecordingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return AIMessage(content='{"materials": [{"name": "SnSe"}]}')
+
+
+def test_concurrent_papers_keep_their_own_tables(extractor, monkeypatch):
+    # Both papers render their prompts before either decides whether to send it
+    barrier = threading.Barrier(2)
+    render = extractor._render_prompt
+
+    def render_then_wait(step, **values):
+        prompt = render(step, **values)
+        barrier.wait(timeout=5)
+        return prompt
+    monkeypatch.setattr(extractor, "_render_prompt", render_then_wait)
+    extractor.set_table_data_extraction_prompt("{material_hint}{combined_block}")
+    llm = RecordingLLM()
+    with_signs = [{"caption": "ZT of SnSe", "rows": [{"T": 300, "ZT": 1.2}]}]
+    without_signs = [{"caption": "Sample list", "rows": [{"id": 1}]}]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(extractor.extract_from_tables, with_signs, llm)
+        second = executor.submit(extractor.extract_from_tables, without_signs, llm)
+        assert first.result()["materials"] == [{"name": "SnSe"}]
+        assert second.result()["materials"] == []
+    assert len(llm.prompts) == 1 and "ZT of SnSe" in llm.prompts[0]
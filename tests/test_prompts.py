@@ -0,0 +1,14 @@
+import pytest
+
+
+def test_render_matches_str_format(extractor):
+    template = "### {fulltext!r} {count:>5} {{literal}} {hint!s:^9}"
+    extractor.set_materials_extraction_prompt(template)
+    values = {"fulltext": "text", "count": 3, "hint": "h"}
+    assert extractor._render_prompt("materials_extraction", **values) == template.format(**values)
+
+
+@pytest.mark.parametrize("template", ["{}", "{0}", "{paper.text}", "{rows[0]}", "{value:{width}}"])
+def test_unsupported_fields_fail_when_set(extractor, template):
+    with pytest.raises(ValueError):
+        extractor.set_materials_extraction_prompt(template)
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "table1.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def _pandas_rows(path):
+    df = pd.read_csv(path)
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+CSVS = {
+    "ragged": "Sample,S,ZT\nBi2Te3,220,1.1\nSnSe,310\nPbTe,180,1.4\n",
+    "duplicate_header": "Sample,S,S\nBi2Te3,220,230\n",
+    "empty_header": "Sample,,\nBi2Te3,220,1.1\n",
+    "suffix_collision": "S,S,S.1\n1,2,3\n",
+    "empty_cells": "Sample,S\nBi2Te3,\n,220\n",
+}
+
+
+@pytest.fixture(params=["pyarrow", "pandas"])
+def read_rows(request, base_module, monkeypatch):
+    if request.param == "pandas":
+        monkeypatch.setattr(base_module, "pa_csv", None)
+    elif base_module.pa_csv is None:
+        pytest.skip("pyarrow is not installed")
+    return base_module.BasePropertiesExtractor._read_table_rows
+
+
+@pytest.mark.parametrize("name", sorted(CSVS))
+def test_rows_match_pandas(tmp_path, read_rows, name):
+    path = _write(tmp_path, CSVS[name])
+    assert read_rows(path) == _pandas_rows(path)
+
+
+def test_ragged_row_is_padded(tmp_path, read_rows):
+    rows = read_rows(_write(tmp_path, CSVS["ragged"]))
+    assert [row["Sample"] for row in rows] == ["Bi2Te3", "SnSe", "PbTe"]
+    assert rows[1]["ZT"] is None
+
+
+def test_duplicate_and_empty_headers_keep_every_column(tmp_path, read_rows):
+    assert read_rows(_write(tmp_path, CSVS["duplicate_header"])) == [{"Sample": "Bi2Te3", "S": 220, "S.1": 230}]
+    assert read_rows(_write(tmp_path, CSVS["empty_header"])) == [{"Sample": "Bi2Te3", "Unnamed: 1": 220, "Unnamed: 2": 1.1}]
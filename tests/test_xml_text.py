@@ -0,0 +1,63 @@
+from lxml import etree
+
+CE = 'xmlns:ce="http://www.elsevier.com/xml/common/dtd"'
+
+
+def _text(xml_module, xml):
+    return xml_module.XMLPaperParser._extract_text_from_elem(etree.fromstring(xml))
+
+
+def test_inline_markup_is_not_spaced(xml_module):
+    xml = f"<ce:para {CE}>Bi<ce:inf>2</ce:inf>Te<ce:inf>3</ce:inf> reaches <ce:italic>ZT</ce:italic> 1.2.</ce:para>"
+    assert _text(xml_module, xml) == "Bi2Te3 reaches ZT 1.2."
+
+
+def test_compact_block_children_are_separated(xml_module):
+    xml = (f"<ce:abstract {CE}><ce:section-title>Abstract</ce:section-title><ce:abstract-sec>"
+           "<ce:simple-para>SnSe shows ZT 2.6.</ce:simple-para>"
+           "<ce:simple-para>Bi<ce:inf>2</ce:inf>Te<ce:inf>3</ce:inf> is good.</ce:simple-para>"
+           "</ce:abstract-sec></ce:abstract>")
+    assert _text(xml_module, xml) == "Abstract SnSe shows ZT 2.6. Bi2Te3 is good."
+
+
+def test_nested_list_and_entryless_row(xml_module):
+    para = (f"<ce:para {CE}>Samples:<ce:list><ce:list-item><ce:para>SnSe</ce:para></ce:list-item>"
+            "<ce:list-item><ce:para>PbTe</ce:para></ce:list-item></ce:list>were measured.</ce:para>")
+    assert _text(xml_module, para) == "Samples: SnSe PbTe were measured."
+    row = f"<row {CE}><ce:simple-para>300 K</ce:simple-para><ce:simple-para>1.2</ce:simple-para></row>"
+    assert _text(xml_module, row) == "300 K 1.2"
+
+
+def test_compact_article_sentences_are_filtered_separately(xml_module, tmp_path):
+    xml = (f'<doc {CE} xmlns:dc="http://purl.org/dc/elements/1.1/" '
+           'xmlns:prism="http://prismstandard.org/namespaces/basic/2.0/">'
+           "<prism:doi>10.1016/j.test.1</prism:doi><dc:title>Test</dc:title>"
+           "<ce:abstract><ce:abstract-sec><ce:simple-para>The weather was fine.</ce:simple-para>"
+           "<ce:simple-para>SnSe shows ZT 2.6 at 923 K.</ce:simple-para></ce:abstract-sec></ce:abstract>"
+           "</doc>")
+    xml_module.XMLPaperParser(str(tmp_path)).parse_xml(xml)
+    filtered = (tmp_path / "10.1016j.test.1" / "fulltext.txt").read_text(encoding="utf-8")
+    assert "SnSe shows ZT 2.6 at 923 K." in filtered.splitlines()
+    assert "weather" not in filtered
+
+
+def test_nfkd_spaces_are_collapsed(xml_module, tmp_path):
+    # U+00A8 decomposes to " ̈": the space NFKD adds must not leave a double space
+    xml = (f'<doc {CE} xmlns:prism="http://prismstandard.org/namespaces/basic/2.0/">'
+           "<prism:doi>10.1016/j.test.2</prism:doi>"
+           "<ce:para>SnSe ¨ reaches ZT 2.6 at 923 K.</ce:para></doc>")
+    xml_module.XMLPaperParser(str(tmp_path)).parse_xml(xml)
+    raw = (tmp_path / "10.1016j.test.2" / "fulltext_raw.txt").read_text(encoding="utf-8")
+    assert "SnSe ̈ reaches ZT 2.6 at 923 K." in raw
+
+
+def test_internal_entity_text_is_kept(xml_module, tmp_path):
+    xml = ('<!DOCTYPE doc [<!ENTITY mat "Bi2Te3">]>'
+           f'<doc {CE} xmlns:dc="http://purl.org/dc/elements/1.1/" '
+           'xmlns:prism="http://prismstandard.org/namespaces/basic/2.0/">'
+           "<prism:doi>10.1016/j.test.3</prism:doi><dc:title>ZT of &mat; films</dc:title>"
+           "<ce:para>The &mat; film reaches ZT 1.2 at 300 K.</ce:para></doc>")
+    xml_module.XMLPaperParser(str(tmp_path)).parse_xml(xml)
+    raw = (tmp_path / "10.1016j.test.3" / "fulltext_raw.txt").read_text(encoding="utf-8")
+    assert "Title: ZT of Bi2Te3 films" in raw
+    assert "The Bi2Te3 film reaches ZT 1.2 at 300 K." in raw
@@ -5,17 +5,26 @@ import re
 import unicodedata
 import csv
 import csv
-from io import BytesIO
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
 from typing import Union
 from lxml import etree
 
-import nltk
-from nltk.tokenize import sent_tokenize
-
 from .helpers import safe_doi
-from .mat_patterns import RETAIN_PATTERNS
+from .mat_patterns import is_retained
+
+# Whitespace runs; compiled once since _clean runs for every extracted element
+_WS_RE = re.compile(r"\s+")
+# Sentence boundary: terminal punctuation followed by a capital letter, or a blank line
+_SENT_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z])|(?:\r?\n){2,}")
+
+def _nfkd(text: str) -> str:
+    # ASCII text is already NFKD; str.isascii() is O(1), normalize() would still scan it
+    return text if text.isascii() else unicodedata.normalize("NFKD", text)
 
-RETAIN_RE = [re.compile(pat, re.IGNORECASE) for pat in RETAIN_PATTERNS]
+# lxml parsers lock while parsing, so each thread (see parse_batch) gets its own
+_TLS = threading.local()
 
 class XMLPaperParser():
     NS = {
@@ -25,15 +34,59 @@ class XMLPaperParser():
         "prism": "http://prismstandard.org/namespaces/basic/2.0/",
         "cals": "http://www.elsevier.com/xml/common/cals/dtd",
     }
+    # os.open flags for output files; O_BINARY only exists (and matters) on Windows
+    WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+    # XPath expressions compiled once at class load instead of re-parsed on every find()
+    _DOI_XP = etree.XPath("(.//prism:doi)[1]", namespaces=NS)
+    _TITLE_XP = etree.XPath("(.//dc:title)[1]", namespaces=NS)
+    _ABSTRACT_XP = etree.XPath("(.//dc:description)[1]", namespaces=NS)
+    # Namespace-agnostic lookups (any prefix or none)
+    _TABLES_XP = etree.XPath(".//*[local-name()='table']")
+    _CAPTION_XP = etree.XPath("(.//*[local-name()='caption'])[1]")
+    _ROWS_XP = etree.XPath(".//*[local-name()='row']")
+    _ENTRIES_XP = etree.XPath("./*[local-name()='entry']")
+    _LOCAL_NAME_XP = etree.XPath(".//*[local-name()=$name]")
+    # Only the elements _extract_data dispatches on, in document order (root included, like root.iter())
+    _BODY_XP = etree.XPath("descendant-or-self::*[local-name()='section-title' or local-name()='para' or local-name()='abstract']")
+
+    # Inline markup: its text is joined to the neighbouring text as is ("Bi<ce:inf>2</ce:inf>" -> "Bi2").
+    # Any other child element (section-title, simple-para, list-item, ...) is a block and gets
+    # a space on both sides, since compact XML has no whitespace between blocks.
+    INLINE_TAGS = frozenset({
+        "inf", "sup", "italic", "bold", "small-caps", "monospace", "sans-serif", "underline",
+        "cross-out", "cross-ref", "cross-refs", "inter-ref", "hsp", "glyph", "font",
+        # MathML
+        "math", "mrow", "mi", "mn", "mo", "mtext", "msub", "msup", "msubsup",
+    })
+    # True if the element contains a block-level descendant, i.e. tostring(method="text") would glue blocks
+    _HAS_BLOCK_XP = etree.XPath(
+        "boolean(.//*[not(" + " or ".join(f"local-name()='{tag}'" for tag in sorted(INLINE_TAGS)) + ")])"
+    )
 
     def __init__(self, storage_dir : str) -> None:
-        nltk.download('punkt_tab')
-        self.storage_dir = storage_dir
+        self._storage_dir = storage_dir
+        os.makedirs(self._storage_dir, exist_ok=True)
 
-    def parse_xml(self, xml_text : str):
-        os.makedirs(self.storage_dir, exist_ok=True)
+    @property
+    def storage_dir(self) -> str:
+        # read-only: parse_xml runs concurrently from several threads on one parser
+        return self._storage_dir
+
+    def parse_batch(self, xml_texts: List[Union[str, bytes]], concurrency: int = 8) -> None:
+        """Parses several articles, at most `concurrency` at a time, with this one parser."""
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(self.parse_xml, xml_texts))
 
-        article_data = self._extract_data(xml_text)
+    def parse_xml(self, xml_text : str):
+        """
+        Parses one article and writes its outputs under storage_dir/<doi>.
+        Keeps no per-article state on the parser, so it is safe to call from several threads
+        for different articles (see parse_batch).
+        """
+        # The document is parsed once; body text and tables are both read from this tree
+        root = self._parse_root(xml_text)
+        article_data = self._extract_data(root) if root is not None else None
         if article_data is None or article_data.get("doi") in (None, "", "N/A"):
             print("[ERROR] Failed to extract article data or DOI. Skipping.")
             return None
@@ -41,6 +94,7 @@ class XMLPaperParser():
         doi = article_data["doi"]
         doi_folder = safe_doi(doi)
         article_output_dir = os.path.join(self.storage_dir, doi_folder)
+        # also recreates storage_dir if it was removed after __init__
         os.makedirs(article_output_dir, exist_ok=True)
 
         # 1) fulltext_raw.txt
@@ -65,7 +119,7 @@ class XMLPaperParser():
             print(f"[OK] Saved: {doi_folder}/fulltext_raw.txt and fulltext.txt")
 
         # 3) tables (csv + cleaned caption + raw xml fragment)
-        n_tables = self._extract_elsevier_tables_from_xml(xml_text, article_output_dir)
+        n_tables = self._extract_elsevier_tables_from_xml(root, article_output_dir)
         if n_tables:
             print(f"[OK] Extracted {n_tables} table(s) for {doi_folder}")
         else:
@@ -75,48 +129,111 @@ class XMLPaperParser():
 
     @staticmethod
     def _compile_raw_fulltext(article_data: Dict) -> str:
-        parts: List[str] = []
-        parts.append(f"Title: {article_data.get('title', 'N/A')}\n")
-        parts.append(f"DOI: {article_data.get('doi', 'N/A')}\n")
-        parts.append("\nAbstract:\n")
-        parts.append(f"{article_data.get('abstract', 'N/A')}\n")
+        # Every piece carries its own separator (line end + blank line), joined once at the end
+        parts: List[str] = [
+            f"Title: {article_data.get('title', 'N/A')}\n\n",
+            f"DOI: {article_data.get('doi', 'N/A')}\n\n",
+            "\nAbstract:\n\n",
+            f"{article_data.get('abstract', 'N/A')}\n\n",
+        ]
 
         sections = article_data.get("sections", {}) or {}
         for section, paras in sections.items():
-            parts.append(f"\n=== {section} ===\n")
-            for para in paras:
-                parts.append(f"{para}\n")
-        return "\n".join(parts).strip() + "\n"
+            parts.append(f"\n=== {section} ===\n\n")
+            parts.extend(f"{para}\n\n" for para in paras)
+        return "".join(parts).strip() + "\n"
 
     @staticmethod
     def _clean(text: Optional[str]) -> str:
         if not text:
             return ""
-        text = unicodedata.normalize("NFKD", text.strip())
-        return re.sub(r"\s+", " ", text)
+        return _WS_RE.sub(" ", _nfkd(text.strip()))
     
+    @classmethod
+    def _dump_text(cls, path: str, text: str) -> None:
+        cls._dump_bytes(path, text.encode("utf-8"))
+
+    @classmethod
+    def _dump_bytes(cls, path: str, data: bytes) -> None:
+        # Re-runs over the same corpus leave identical files untouched (and their mtimes intact)
+        if cls._unchanged(path, data):
+            return
+        # The content is already fully encoded: write it straight to the fd, no io buffer layers
+        fd = os.open(path, cls.WRITE_FLAGS, 0o666)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]   # os.write may write only part of a large buffer
+        finally:
+            os.close(fd)
+
     @staticmethod
-    def _dump_text(path: str, text: str) -> None:
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(text)
+    def _unchanged(path: str, data: bytes) -> bool:
+        """True if `path` already holds exactly `data`; a size mismatch is caught by stat() alone."""
+        try:
+            if os.path.getsize(path) != len(data):
+                return False
+            with open(path, "rb") as f:
+                return f.read() == data
+        except OSError:
+            return False
 
     @staticmethod
     def _is_material_related(sentence: str) -> bool:
-        return any(pat.search(sentence) for pat in RETAIN_RE)
+        return is_retained(sentence)
 
 
+    @classmethod
+    def _collect_text(cls, elem: etree._Element, parts: List[str]) -> None:
+        if elem.text:
+            parts.append(elem.text)
+        for child in elem:
+            if isinstance(child.tag, str):   # comments and PIs contribute only their tail
+                sep = "" if etree.QName(child).localname in cls.INLINE_TAGS else " "
+                parts.append(sep)
+                cls._collect_text(child, parts)
+                parts.append(sep)
+            if child.tail:
+                parts.append(child.tail)
+
     @classmethod
     def _extract_text_from_elem(cls, elem: etree._Element) -> str:
-        return cls._clean(" ".join(t.strip() for t in elem.itertext() if t and t.strip()))
+        """
+        Element text, NFKD-normalized, with whitespace collapsed; block-level children are
+        separated by a space (see INLINE_TAGS). Elements holding only inline markup, the common
+        case, are concatenated by lxml in C.
+        """
+        if cls._HAS_BLOCK_XP(elem):
+            parts: List[str] = []
+            cls._collect_text(elem, parts)
+            text = "".join(parts)
+        else:
+            text = etree.tostring(elem, method="text", encoding="unicode", with_tail=False)
+        # NFKD before the collapse: it can itself produce spaces (U+00A8 -> " \u0308")
+        return _WS_RE.sub(" ", _nfkd(text)).strip()
     
     @classmethod
     def _filter_raw_fulltext(cls, text: str) -> List[str]:
-        sentences = sent_tokenize(text)
+        sentences = _SENT_SPLIT_RE.split(text)
         filtered_senstences = [s for s in sentences if cls._is_material_related(s)]
         return filtered_senstences
 
+    @staticmethod
+    def _first(elements: List[etree._Element]) -> Optional[etree._Element]:
+        return elements[0] if elements else None
+
+    @staticmethod
+    def _get_parser() -> etree.XMLParser:
+        parser = getattr(_TLS, "parser", None)
+        if parser is None:
+            # No ID table (nothing looks ids up) and no size limits for large papers. Entities keep the
+            # default, as with etree.fromstring: internal ones are expanded into the text, external ones
+            # are not loaded (lxml >= 5)
+            parser = _TLS.parser = etree.XMLParser(collect_ids=False, huge_tree=True)
+        return parser
+
     @classmethod
-    def _extract_data(cls, xml_text: Union[str, bytes]) -> Optional[Dict]:
+    def _parse_root(cls, xml_text: Union[str, bytes]) -> Optional[etree._Element]:
         if isinstance(xml_text, str):
             xml_bytes = xml_text.encode("utf-8", errors="replace")
         else:
@@ -124,29 +241,28 @@ class XMLPaperParser():
 
         try:
             # парсим напрямую из строки/байтов
-            root = etree.fromstring(xml_bytes)
+            return etree.fromstring(xml_bytes, cls._get_parser())
         except etree.XMLSyntaxError as e:
             print(f"[ERROR] XML parse error (string input): {e}")
             return None
 
-        doi_element = root.find(".//prism:doi", namespaces=cls.NS)
+    @classmethod
+    def _extract_data(cls, root: etree._Element) -> Dict:
+        doi_element = cls._first(cls._DOI_XP(root))
         doi = cls._clean(doi_element.text) if doi_element is not None and doi_element.text else "N/A"
 
-        title_element = root.find(".//dc:title", namespaces=cls.NS)
+        title_element = cls._first(cls._TITLE_XP(root))
         title = cls._clean(title_element.text) if title_element is not None and title_element.text else "N/A"
 
-        abstract_element = root.find(".//dc:description", namespaces=cls.NS)
+        abstract_element = cls._first(cls._ABSTRACT_XP(root))
         abstract = cls._clean(abstract_element.text) if abstract_element is not None and abstract_element.text else "N/A"
 
         sections: Dict[str, List[str]] = {}
         current_section = "Introduction"
         sections[current_section] = []
 
-        for elem in root.iter():
-            try:
-                tag = etree.QName(elem.tag).localname
-            except Exception:
-                continue
+        for elem in cls._BODY_XP(root):
+            tag = etree.QName(elem).localname
 
             if tag == "section-title":
                 section_title_text = cls._extract_text_from_elem(elem)
@@ -165,14 +281,14 @@ class XMLPaperParser():
 
         return {"doi": doi, "title": title, "abstract": abstract, "sections": sections}
 
-    @staticmethod
-    def _findall_local(elem, name: str):
+    @classmethod
+    def _findall_local(cls, elem, name: str):
         # ищет элементы независимо от namespace
-        return elem.findall(f".//{{*}}{name}")
+        return cls._LOCAL_NAME_XP(elem, name=name)
     
-    @staticmethod
-    def _find_tables_any_ns_etree(root):
-        return root.findall(".//{*}table")
+    @classmethod
+    def _find_tables_any_ns_etree(cls, root):
+        return cls._TABLES_XP(root)
     
     @staticmethod
     def _clean_caption_by_removing_cells(caption: str, rows: List[List[str]]) -> str:
@@ -192,85 +308,74 @@ class XMLPaperParser():
         out = caption
 
         for row in rows:
-            row_text = " ".join((c or "").strip() for c in row if (c or "").strip())
+            # Each cell is stripped once; empty and None cells are dropped
+            row_text = " ".join(filter(None, (c.strip() for c in row if c)))
             if row_text and row_text in out:
                 out = out.replace(row_text, " ")
 
-        out = re.sub(r"\s+", " ", out).strip()
+        out = _WS_RE.sub(" ", out).strip()
         return out
 
     @classmethod
-    def _extract_elsevier_tables_from_xml(cls, xml_text: Union[str, bytes], output_dir: str) -> int:
+    def _extract_elsevier_tables_from_xml(cls, root: etree._Element, output_dir: str) -> int:
         """
-        Extract tables from XML *content* (string/bytes) and write:
+        Extract tables from the parsed XML tree and write:
         - table{i}.csv
         - table{i}_caption.txt
         - table{i}.xml   (raw fragment if available)
         Returns number of tables successfully written.
         """
-        # Keep parsing behavior close to etree.parse(path) by using etree.parse(file-like)
-        if isinstance(xml_text, str):
-            xml_bytes = xml_text.encode("utf-8", errors="replace")
-        else:
-            xml_bytes = xml_text
-
-        try:
-            tree = etree.parse(BytesIO(xml_bytes))
-            root = tree.getroot()
-        except etree.XMLSyntaxError as e:
-            print(f"[ERROR] XML parse error (tables, string input): {e}")
-            return 0
-
         tables = cls._find_tables_any_ns_etree(root)
         if not tables:
             return 0
 
-        written = 0
-        for idx, table in enumerate(tables, start=1):
-            # Caption
-            caption_text = ""
-            caption_elem = table.find(".//{*}caption")  # вместо ce:caption
-            if caption_elem is not None:
-                caption_text = cls._extract_text_from_elem(caption_elem)
-
-            # Rows / Entries (CALS)
-            rows = []
-            for row_elem in cls._findall_local(table, "row"):          # вместо ce:row
-                row_cells = []
-                entries = [e for e in row_elem.findall("./{*}entry")]  # entry обычно прямые дети row
-                if not entries:
-                    row_text = cls._extract_text_from_elem(row_elem)
-                    if row_text:
-                        row_cells = [row_text]
-                else:
-                    for cell in entries:
-                        row_cells.append(cls._extract_text_from_elem(cell))
-                if row_cells:
-                    rows.append(row_cells)
-
-            # Clean caption using exact cell removals (integrated)
-            cleaned_caption = cls._clean_caption_by_removing_cells(caption_text, rows)
-
-            # Write files
-            csv_path = os.path.join(output_dir, f"table{idx}.csv")
-            cap_path = os.path.join(output_dir, f"table{idx}_caption.txt")
-            xml_frag_path = os.path.join(output_dir, f"table{idx}.xml")
-
-            try:
-                with open(csv_path, "w", encoding="utf-8", newline="") as f:
-                    writer = csv.writer(f)
-                    if rows:
-                        writer.writerows(rows)
-
-                cls._dump_text(cap_path, cleaned_caption)
-
-                # Raw XML fragment (maximally "full" / lossless)
-                xml_str = etree.tostring(table, encoding="unicode")
-                cls._dump_text(xml_frag_path, xml_str)
-
-                written += 1
-            except OSError as e:
-                print(f"[ERROR] Failed to write table{idx} files in {output_dir}: {e}")
-                continue
-
-        return written
+        return sum(cls._process_one_table(idx, table, output_dir) for idx, table in enumerate(tables, start=1))
+
+    @classmethod
+    def _process_one_table(cls, idx: int, table: etree._Element, output_dir: str) -> int:
+        """Writes the csv, caption and xml files of one table; returns 1 if all were written, else 0."""
+        # Caption
+        caption_text = ""
+        caption_elem = cls._first(cls._CAPTION_XP(table))  # вместо ce:caption
+        if caption_elem is not None:
+            caption_text = cls._extract_text_from_elem(caption_elem)
+
+        # Rows / Entries (CALS)
+        rows = []
+        for row_elem in cls._ROWS_XP(table):                        # вместо ce:row
+            row_cells = []
+            entries = cls._ENTRIES_XP(row_elem)                     # entry обычно прямые дети row
+            if not entries:
+                row_text = cls._extract_text_from_elem(row_elem)
+                if row_text:
+                    row_cells = [row_text]
+            else:
+                row_cells = [cls._extract_text_from_elem(cell) for cell in entries]
+            if row_cells:
+                rows.append(row_cells)
+
+        # Clean caption using exact cell removals (integrated)
+        cleaned_caption = cls._clean_caption_by_removing_cells(caption_text, rows)
+
+        # Write files
+        csv_path = os.path.join(output_dir, f"table{idx}.csv")
+        cap_path = os.path.join(output_dir, f"table{idx}_caption.txt")
+        xml_frag_path = os.path.join(output_dir, f"table{idx}.xml")
+
+        try:
+            # CSV is built in memory, so it can be compared with the existing file before writing
+            csv_buffer = StringIO(newline="")
+            if rows:
+                csv.writer(csv_buffer).writerows(rows)
+            cls._dump_bytes(csv_path, csv_buffer.getvalue().encode("utf-8"))
+
+            cls._dump_text(cap_path, cleaned_caption)
+
+            # Raw XML fragment (maximally "full" / lossless)
+            # serialized straight to UTF-8 bytes: no str round trip and no re-encode on write
+            xml_bytes = etree.tostring(table, encoding="utf-8")
+            cls._dump_bytes(xml_frag_path, xml_bytes)
+        except OSError as e:
+            print(f"[ERROR] Failed to write table{idx} files in {output_dir}: {e}")
+            return 0
+        return 1